@@ -1,13 +1,11 @@
 import os
-from flask import Flask
+from flask import Flask, request, flash, redirect, url_for
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from authlib.integrations.flask_client import OAuth
 from dotenv import load_dotenv
-import requests
 from flask_apscheduler import APScheduler
 from datetime import datetime
-import pytz
 
 load_dotenv()
 
@@ -21,57 +19,11 @@ scheduler = APScheduler()
 
 
 # ===============================
-# SendGrid Email Function (FINAL DEBUG VERSION)
+# Email Function
 # ===============================
 def send_email(to_email, subject, body):
-    api_key = os.environ.get("SENDGRID_API_KEY")
-    sender = os.environ.get("MAIL_DEFAULT_SENDER")
-
-    if not api_key:
-        print("❌ ERROR: SENDGRID_API_KEY not found.")
-        return False
-
-    if not sender:
-        print("❌ ERROR: MAIL_DEFAULT_SENDER not set.")
-        return False
-
-    url = "https://api.sendgrid.com/v3/mail/send"
-
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-
-    data = {
-        "personalizations": [{
-            "to": [{"email": to_email}],
-            "subject": subject
-        }],
-        "from": {"email": sender},
-        "content": [{
-            "type": "text/plain",
-            "value": body
-        }]
-    }
-
-    try:
-        print("📤 Sending email to:", to_email)
-
-        response = requests.post(url, headers=headers, json=data, timeout=10)
-
-        print("📨 SendGrid response code:", response.status_code)
-        print("📨 SendGrid response body:", response.text)
-
-        if 200 <= response.status_code < 300:
-            print("✅ Email accepted by SendGrid")
-            return True
-        else:
-            print("❌ Email rejected by SendGrid")
-            return False
-
-    except Exception as e:
-        print("❌ SendGrid request failed:", e)
-        return False
+    from .mailer import get_dispatcher, EmailMessage
+    return get_dispatcher().send(EmailMessage(to_email, subject, body))
 
 
 # ===============================
@@ -84,6 +36,9 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SCHEDULER_API_ENABLED'] = True
+    app.config['REMINDER_BATCH_SIZE'] = int(os.getenv('REMINDER_BATCH_SIZE', 100))
+    # Hard cap on request bodies; single resumes are further limited by RESUME_MAX_BYTES
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 50 * 1024 * 1024))
 
     db.init_app(app)
     login_manager.init_app(app)
@@ -91,6 +46,12 @@ def create_app():
     oauth.init_app(app)
     scheduler.init_app(app)
 
+    from . import llm
+    llm.init_app(app)
+
+    from . import jobs
+    jobs.init_app(app)
+
     # ===============================
     # Google OAuth
     # ===============================
@@ -112,6 +73,13 @@ def create_app():
             }
         )
 
+    @app.errorhandler(413)
+    def request_too_large(e):
+        if request.endpoint == 'ats.ats_checker_batch':
+            return {"error": "Upload is too large."}, 413
+        flash('Upload is too large.', 'error')
+        return redirect(request.referrer or url_for('main.dashboard'))
+
     from .models import User
 
     @login_manager.user_loader
@@ -148,35 +116,69 @@ def create_app():
     from .interview import interview as interview_blueprint
     app.register_blueprint(interview_blueprint)
 
+    from .jobs import jobs as jobs_blueprint
+    app.register_blueprint(jobs_blueprint)
+
     with app.app_context():
         db.create_all()
 
+        from .schema import upgrade_schema
+        upgrade_schema()
+
+        from .search import ensure_index
+        ensure_index()
+
+    # Warm the resume layout templates so the first editor render is fast
+    from .template_registry import registry as template_registry
+    template_registry.precompile(app.jinja_env)
+
     # ===============================
     # Reminder Job
     # ===============================
     def check_for_reminders():
+        from .leader import owns_scheduled_jobs
+        if not owns_scheduled_jobs():
+            # Lease lost between heartbeats; the new leader will pick these up
+            return
+
         with app.app_context():
             print("\n==============================")
             print(f"[{datetime.now()}] Scheduler checking for reminders...")
             print("==============================")
 
             from .models import Event, User
-
-            ist = pytz.timezone('Asia/Kolkata')
-            now = datetime.now(ist)
-
-            events_to_notify = Event.query.filter_by(email_sent=False).all()
-            print("📌 Unsent events found:", len(events_to_notify))
-
-            for event in events_to_notify:
-                print("🔎 Checking event:", event.title)
-                print("   Expired:", event.is_expired)
-
-                if event.is_expired:
-                    user = User.query.get(event.user_id)
-
+            from .mailer import get_dispatcher, EmailMessage
+
+            now_utc = datetime.utcnow()
+            batch_size = app.config['REMINDER_BATCH_SIZE']
+            last_id = 0
+            processed = 0
+
+            # Keyset-paginate over due events only; failed sends stay unsent
+            # for the next tick without being revisited in this one.
+            while True:
+                events_to_notify = (
+                    Event.query
+                    .filter(Event.email_sent.is_(False), Event.due_at <= now_utc, Event.id > last_id)
+                    .order_by(Event.id)
+                    .limit(batch_size)
+                    .all()
+                )
+                if not events_to_notify:
+                    break
+
+                print("📌 Due events in batch:", len(events_to_notify))
+                last_id = events_to_notify[-1].id
+                processed += len(events_to_notify)
+
+                users = {u.id: u for u in User.query.filter(
+                    User.id.in_({e.user_id for e in events_to_notify})
+                )}
+                outgoing = []
+                for event in events_to_notify:
+                    user = users.get(event.user_id)
                     if user and user.email:
-                        success = send_email(
+                        outgoing.append((event, EmailMessage(
                             user.email,
                             f"Reminder: {event.title}",
                             f"""Hi {user.username},
@@ -188,22 +190,30 @@ Time: {event.time}
 
 Best regards,
 StudentHub Team"""
-                        )
-
-                        if success:
-                            event.email_sent = True
-                            db.session.commit()
-                            print("✅ Event marked as email_sent = True")
-                        else:
-                            db.session.rollback()
-                            print("❌ Email failed — DB rolled back")
-                else:
-                    print("⏭ Event not expired yet")
+                        )))
+
+                results = get_dispatcher().send_batch([msg for _, msg in outgoing])
+                sent = 0
+                for (event, _), success in zip(outgoing, results):
+                    if success:
+                        event.email_sent = True
+                        sent += 1
+
+                # One transaction per batch; failed sends stay unsent for the next tick
+                db.session.commit()
+                print(f"✅ {sent}/{len(outgoing)} reminders sent and marked email_sent = True")
+
+                if len(events_to_notify) < batch_size:
+                    break
+
+            print("📌 Due events processed:", processed)
 
     # ===============================
     # Start Scheduler
     # ===============================
-    if not scheduler.running:
+    # Only the process holding the scheduler lease runs jobs (see leader.py)
+    from . import leader
+    if scheduler.get_job('reminder_job') is None:
         scheduler.add_job(
             id='reminder_job',
             func=check_for_reminders,
@@ -214,7 +224,6 @@ StudentHub Team"""
             misfire_grace_time=30,
             coalesce=True
         )
-        scheduler.start()
-        print("🚀 Scheduler started successfully.")
+    leader.init_app(app, scheduler)
 
     return app
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+SQLite-backed cache of chatbot answers from the LLM fallback.
+
+Queries are normalized (lowercased, stopwords dropped, tokens sorted) so
+"What is a closure?" and "closure, what is it" share one entry. Follow-up
+questions also key on the previous exchange, since their answer depends
+on it. Entries expire after CHAT_CACHE_TTL seconds and the table is
+trimmed to CHAT_CACHE_MAX_ROWS, least recently used first.
+"""
+import os
+import re
+import hashlib
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from . import db
+from .models import ChatResponseCache
+
+CACHE_TTL = int(os.getenv('CHAT_CACHE_TTL', 7 * 24 * 3600))
+MAX_ROWS = int(os.getenv('CHAT_CACHE_MAX_ROWS', 5000))
+
+TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'of', 'in', 'on', 'to', 'for', 'and', 'or',
+    'what', 'whats', 'how', 'why', 'do', 'does', 'can', 'you', 'me', 'i', 'my', 'it', 'its', 'this',
+    'that', 'tell', 'about', 'explain', 'please', 'with', 'by', 'as', 'at'
+}
+
+
+def normalize_query(text):
+    tokens = {t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS}
+    return " ".join(sorted(tokens))
+
+
+def cache_key(query, history=None):
+    """
+    Returns (key, normalized_query). Pass `history` only for follow-ups;
+    the last exchange is folded into the key.
+    """
+    normalized = normalize_query(query)
+    material = normalized
+    if history:
+        context = " | ".join(normalize_query(h['content']) for h in history[-2:])
+        material = f"{normalized} || {context}"
+    return hashlib.sha256(material.encode('utf-8')).hexdigest(), normalized
+
+
+def get(key):
+    entry = ChatResponseCache.query.filter_by(key=key).first()
+    if entry is None:
+        return None
+
+    now = datetime.utcnow()
+    if entry.created_at < now - timedelta(seconds=CACHE_TTL):
+        db.session.delete(entry)
+        db.session.commit()
+        return None
+
+    entry.hits = (entry.hits or 0) + 1
+    entry.last_used_at = now
+    db.session.commit()
+    return entry.answer
+
+
+def put(key, normalized_query, answer):
+    try:
+        db.session.add(ChatResponseCache(key=key, normalized_query=normalized_query, answer=answer))
+        db.session.commit()
+    except IntegrityError:
+        # Another request cached the same question first
+        db.session.rollback()
+        return
+
+    _evict()
+
+
+def _evict():
+    cutoff = datetime.utcnow() - timedelta(seconds=CACHE_TTL)
+    ChatResponseCache.query.filter(ChatResponseCache.created_at < cutoff).delete(synchronize_session=False)
+
+    overflow = (
+        db.session.query(ChatResponseCache.id)
+        .order_by(ChatResponseCache.last_used_at.desc())
+        .offset(MAX_ROWS)
+        .subquery()
+    )
+    ChatResponseCache.query.filter(ChatResponseCache.id.in_(db.select(overflow.c.id))).delete(synchronize_session=False)
+    db.session.commit()
@@ -1,107 +1,131 @@
-from flask import Blueprint, render_template, request, flash
+from flask import Blueprint, render_template, request, flash, Response, redirect, url_for
 from flask_login import login_required
+from werkzeug.utils import secure_filename
 import re
 import io
-from pypdf import PdfReader
-import docx
-from collections import Counter
-from .ats_utils import get_pdf_structure, get_docx_structure
+import os
+import copy
+import json
+import shutil
+import tempfile
+from .ats_utils import parse_document
+from .resume_parser import SECTION_KEYWORDS, parse_resume
+from .cache import LRUCache, content_hash
+from .uploads import save_upload, UploadTooLarge
+from .ats_batch import SUPPORTED_EXTENSIONS
+from .jobs import submit as submit_job, redirect_to, get_user_job, JobFailed, get_pool as get_job_pool, pool_size as job_pool_size, \
+    upload_path as job_upload_path
 
 ats = Blueprint('ats', __name__)
 
-def extract_text_from_pdf(file_stream):
-    try:
-        file_stream.seek(0)
-        reader = PdfReader(file_stream)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() or ""
-        return text
-    except Exception as e:
-        print(f"PDF extraction error: {e}")
-        return ""
-
-def extract_text_from_docx(file_stream):
-    try:
-        file_stream.seek(0)
-        doc = docx.Document(file_stream)
-        text = ""
-        for para in doc.paragraphs:
-            text += para.text + "\n"
-        return text
-    except Exception as e:
-        print(f"DOCX extraction error: {e}")
-        return ""
+# Parsed documents and JD-independent scores, keyed by SHA-256 of the upload.
+# Set ATS_CACHE_DIR to add an on-disk tier shared by all workers. Each cache
+# holds at most ATS_CACHE_MB in memory and ATS_CACHE_DISK_MB on disk.
+_cache_dir = os.getenv('ATS_CACHE_DIR')
+_cache_size = int(os.getenv('ATS_CACHE_SIZE', 128))
+_cache_bytes = int(os.getenv('ATS_CACHE_MB', 32)) * 1024 * 1024
+_cache_disk_bytes = int(os.getenv('ATS_CACHE_DISK_MB', 256)) * 1024 * 1024
+parsed_cache = LRUCache(_cache_size, disk_dir=os.path.join(_cache_dir, 'parsed') if _cache_dir else None,
+                        max_bytes=_cache_bytes, max_disk_bytes=_cache_disk_bytes)
+score_cache = LRUCache(_cache_size, disk_dir=os.path.join(_cache_dir, 'scores') if _cache_dir else None,
+                       max_bytes=_cache_bytes, max_disk_bytes=_cache_disk_bytes)
 
-def calculate_ats_score(resume_text, job_description=None, structure_data=None):
+# ===============================
+# Scoring rule tables (compiled once at import)
+# ===============================
+WORD_RE = re.compile(r'\w+')
+
+METRICS_RE = re.compile(r'\d+%|\$\d+|[0-9]+[\s]*(?:percent|dollars|users|employees|clients|revenue|profit|growth|scale|impact|saved|reduced|increased|improved)', re.I)
+
+ACTION_VERBS = frozenset({
+    'implemented', 'developed', 'managed', 'led', 'created', 'designed', 'optimized', 'spearheaded', 
+    'orchestrated', 'coordinated', 'achieved', 'launched', 'accelerated', 'administered', 'analyzed',
+    'arranged', 'authored', 'budgeted', 'built', 'calculated', 'centralized', 'clarified', 'collaborated',
+    'composed', 'conducted', 'consolidated', 'constructed', 'consulted', 'controlled', 'converted',
+    'counseled', 'criticized', 'cultivated', 'customized', 'debugged', 'decreased', 'delegated',
+    'delivered', 'demonstrated', 'depicted', 'detailed', 'determined', 'devised', 'directed',
+    'discovered', 'drafted', 'educated', 'eliminated', 'enabled', 'enforced', 'engineered',
+    'enhanced', 'established', 'evaluated', 'examined', 'executed', 'expanded', 'expedited',
+    'explained', 'facilitated', 'finalized', 'focused', 'forecasted', 'formed', 'formulated',
+    'fostered', 'generated', 'guided', 'handled', 'identified', 'illustrated', 'improved',
+    'increased', 'influenced', 'informed', 'initiated', 'inspected', 'inspired', 'installed',
+    'instigated', 'instructed', 'insured', 'integrated', 'interpreted', 'investigated', 'itemized'
+})
+
+CLICHES = frozenset({'passionate', 'hardworking', 'team-player', 'guru', 'ninja', 'motivated', 'synergy', 'thought-leader'})
+
+# (section, combined keyword pattern, help text when missing)
+# Patterns are shared with the resume builder's parser (resume_parser.SECTION_KEYWORDS)
+SECTION_RULES = [
+    ('Experience', SECTION_KEYWORDS['Experience'], "Your professional work history is missing or not clearly labeled."),
+    ('Education', SECTION_KEYWORDS['Education'], "Your academic background couldn't be detected."),
+    ('Skills', SECTION_KEYWORDS['Skills'], "A dedicated 'Skills' section helps highlight your technical toolkit."),
+    ('Summary', SECTION_KEYWORDS['Summary'], "A Professional Summary at the top helps frame your value proposition.")
+]
+
+# (label, pattern, help text when missing)
+CONTACT_RULES = [
+    ('Email', re.compile(r'[\w\.-]+@[\w\.-]+', re.I), "Provide a valid email address."),
+    ('Phone', re.compile(r'\+?[\d\s\-\.\(\)]{10,18}', re.I), "Include a professional phone number."),
+    ('Socials', re.compile(r'(?:linkedin\.com\/in\/|github\.com/|portfolio|behance\.net)', re.I), "Add your LinkedIn or Portfolio link.")
+]
+
+JD_CLEAN_RE = re.compile(r'[^a-zA-Z0-9\s]')
+
+JD_STOP_WORDS = frozenset({'and', 'the', 'to', 'of', 'a', 'in', 'is', 'for', 'with', 'on', 'at', 'by', 'an', 'be', 'this', 'that'})
+
+def score_resume_base(resume_text, structure_data=None):
+    """
+    Scores every category that does not depend on the job description.
+    The result is JSON-serializable so it can be cached per resume and
+    finished by apply_job_description() for each JD.
+    """
     results = {
-        'total_score': 0,
         'categories': {
             'content': {'score': 0, 'checks': []},
             'sections': {'score': 0, 'checks': []},
             'formatting': {'score': 0, 'checks': []},
             'layout': {'score': 0, 'checks': []},
-            'essentials': {'score': 0, 'checks': []},
-            'tailoring': {'score': 0, 'checks': []}
+            'essentials': {'score': 0, 'checks': []}
         },
-        'missing_keywords': [],
         'parsed_text_preview': resume_text[:1000] + "..." if len(resume_text) > 1000 else resume_text
     }
 
-    words = re.findall(r'\w+', resume_text.lower())
+    # Single tokenization pass; every word-level rule is a set lookup on it
+    words = WORD_RE.findall(resume_text.lower())
+    unique_words = set(words)
     
     # 1. CONTENT ANALYSIS (20% Weight) - Reduced from 40% to make room for visuals
-    action_verbs = {
-        'implemented', 'developed', 'managed', 'led', 'created', 'designed', 'optimized', 'spearheaded', 
-        'orchestrated', 'coordinated', 'achieved', 'launched', 'accelerated', 'administered', 'analyzed',
-        'arranged', 'authored', 'budgeted', 'built', 'calculated', 'centralized', 'clarified', 'collaborated',
-        'composed', 'conducted', 'consolidated', 'constructed', 'consulted', 'controlled', 'converted',
-        'counseled', 'criticized', 'cultivated', 'customized', 'debugged', 'decreased', 'delegated',
-        'delivered', 'demonstrated', 'depicted', 'detailed', 'determined', 'devised', 'directed',
-        'discovered', 'drafted', 'educated', 'eliminated', 'enabled', 'enforced', 'engineered',
-        'enhanced', 'established', 'evaluated', 'examined', 'executed', 'expanded', 'expedited',
-        'explained', 'facilitated', 'finalized', 'focused', 'forecasted', 'formed', 'formulated',
-        'fostered', 'generated', 'guided', 'handled', 'identified', 'illustrated', 'improved',
-        'increased', 'influenced', 'informed', 'initiated', 'inspected', 'inspired', 'installed',
-        'instigated', 'instructed', 'insured', 'integrated', 'interpreted', 'investigated', 'itemized'
-    }
-    verbs_found = [w for w in words if w in action_verbs]
-    verbs_score = min(100, len(set(verbs_found)) * 10)
+    unique_verbs = len(ACTION_VERBS.intersection(unique_words))
+    verbs_score = min(100, unique_verbs * 10)
     
-    metrics_found = len(re.findall(r'\d+%|\$\d+|[0-9]+[\s]*(?:percent|dollars|users|employees|clients|revenue|profit|growth|scale|impact|saved|reduced|increased|improved)', resume_text, re.I))
+    metrics_found = len(METRICS_RE.findall(resume_text))
     impact_score = min(100, metrics_found * 20)
     
-    cliches = {'passionate', 'hardworking', 'team-player', 'guru', 'ninja', 'motivated', 'synergy', 'thought-leader'}
-    cliches_found = [w for w in words if w in cliches]
-    cliche_penalty = len(set(cliches_found)) * 5
+    cliche_penalty = len(CLICHES.intersection(unique_words)) * 5
     
     content_score = max(0, round(((verbs_score * 0.6) + (impact_score * 0.4)) - cliche_penalty))
     
     results['categories']['content']['score'] = content_score
     results['categories']['content']['checks'] = [
         {'name': 'Action Verbs', 'status': 'pass' if verbs_score >= 70 else 'fail', 
-         'message': f'Found {len(set(verbs_found))} unique action verbs. Try adding more leadership words like "Spearheaded" or "Accelerated".' if verbs_score < 70 else f'Great use of {len(set(verbs_found))} unique action verbs!'},
+         'message': f'Found {unique_verbs} unique action verbs. Try adding more leadership words like "Spearheaded" or "Accelerated".' if verbs_score < 70 else f'Great use of {unique_verbs} unique action verbs!'},
         {'name': 'Impact Metrics', 'status': 'pass' if impact_score >= 60 else 'fail', 
          'message': f'Found only {metrics_found} quantifiable results. Proof your impact with percentages (%) or numbers.' if impact_score < 60 else f'Excellent job quantifying your impact with {metrics_found} metrics.'}
     ]
 
     # 2. SECTIONS & STRUCTURE (15% Weight)
-    essential_sections = {
-        'Experience': ([r'experience', r'employment', r'work history', r'background'], "Your professional work history is missing or not clearly labeled."),
-        'Education': ([r'education', r'academic', r'degree'], "Your academic background couldn't be detected."),
-        'Skills': ([r'skills', r'technologies', r'expertise', r'tools'], "A dedicated 'Skills' section helps highlight your technical toolkit."),
-        'Summary': ([r'summary', r'objective', r'profile'], "A Professional Summary at the top helps frame your value proposition.")
-    }
     found_sections = 0
-    for section, (patterns, help_text) in essential_sections.items():
-        found = any(re.search(p, resume_text, re.I) for p in patterns)
+    sections_found = parse_resume(resume_text)['sections_found']
+    for section, pattern, help_text in SECTION_RULES:
+        found = section in sections_found
         if found: found_sections += 1
         results['categories']['sections']['checks'].append({
             'name': f'{section} Section',
             'status': 'pass' if found else 'fail',
             'message': help_text if not found else f'Found your {section} section.'
         })
-    results['categories']['sections']['score'] = int((found_sections / len(essential_sections)) * 100)
+    results['categories']['sections']['score'] = int((found_sections / len(SECTION_RULES)) * 100)
 
     # 3. FORMATTING & STYLE (15% Weight) - NEW
     formatting_score = 100
@@ -186,14 +210,9 @@ def calculate_ats_score(resume_text, job_description=None, structure_data=None):
     results['categories']['layout']['checks'] = layout_checks
 
     # 5. ATS ESSENTIALS (15% Weight)
-    contact_checks = {
-        'Email': (r'[\w\.-]+@[\w\.-]+', "Provide a valid email address."),
-        'Phone': (r'\+?[\d\s\-\.\(\)]{10,18}', "Include a professional phone number."),
-        'Socials': (r'(?:linkedin\.com\/in\/|github\.com/|portfolio|behance\.net)', "Add your LinkedIn or Portfolio link.")
-    }
     found_contacts = 0
-    for label, (pattern, help_text) in contact_checks.items():
-        found = bool(re.search(pattern, resume_text, re.I))
+    for label, pattern, help_text in CONTACT_RULES:
+        found = bool(pattern.search(resume_text))
         if found: found_contacts += 1
         results['categories']['essentials']['checks'].append({
             'name': label, 'status': 'pass' if found else 'fail', 'message': help_text if not found else f'{label} detected.'
@@ -205,13 +224,40 @@ def calculate_ats_score(resume_text, job_description=None, structure_data=None):
     
     results['categories']['essentials']['score'] = round(((found_contacts / 3) * 70) + (30 if length_status == 'pass' else 15))
 
+    # Signals the JD-dependent stage needs
+    results['signals'] = {
+        'words': sorted(unique_words),
+        'unique_verbs': unique_verbs,
+        'verbs_score': verbs_score,
+        'metrics_found': metrics_found,
+        'impact_score': impact_score
+    }
+    return results
+
+def apply_job_description(base, job_description=None):
+    """
+    Adds the tailoring category, total score and improvement list on top of
+    a score_resume_base() result without mutating it.
+    """
+    results = {
+        'total_score': 0,
+        'categories': copy.deepcopy(base['categories']),
+        'missing_keywords': [],
+        'parsed_text_preview': base['parsed_text_preview']
+    }
+    results['categories']['tailoring'] = {'score': 0, 'checks': []}
+
+    signals = base['signals']
+    verbs_score = signals['verbs_score']
+    impact_score = signals['impact_score']
+    metrics_found = signals['metrics_found']
+
     # 6. TAILORING (20% Weight)
     has_jd = bool(job_description and job_description.strip())
     if has_jd:
-        resume_words_set = set(words)
-        job_words = set(re.sub(r'[^a-zA-Z0-9\s]', '', job_description.lower()).split())
-        stop_words = {'and', 'the', 'to', 'of', 'a', 'in', 'is', 'for', 'with', 'on', 'at', 'by', 'an', 'be', 'this', 'that'}
-        job_keywords = {w for w in job_words if len(w) > 3 and w not in stop_words}
+        resume_words_set = set(signals['words'])
+        job_words = set(JD_CLEAN_RE.sub('', job_description.lower()).split())
+        job_keywords = {w for w in job_words if len(w) > 3 and w not in JD_STOP_WORDS}
         
         if job_keywords:
             matched = resume_words_set.intersection(job_keywords)
@@ -248,7 +294,7 @@ def calculate_ats_score(resume_text, job_description=None, structure_data=None):
     # Priority 3: Context-aware gaps
     if results['categories']['content']['score'] < 90:
         if verbs_score < 90:
-            results['improvements'].append(f"Strength Tip: Your resume uses {len(set(verbs_found))} action verbs. For a top-tier resume, aim for 15+ unique leadership verbs.")
+            results['improvements'].append(f"Strength Tip: Your resume uses {signals['unique_verbs']} action verbs. For a top-tier resume, aim for 15+ unique leadership verbs.")
         if impact_score < 90:
             results['improvements'].append(f"Result Tip: We found {metrics_found} metrics. Try to quantify at least 5-7 achievements with numbers or % to prove your value.")
             
@@ -261,6 +307,37 @@ def calculate_ats_score(resume_text, job_description=None, structure_data=None):
     
     return results
 
+def calculate_ats_score(resume_text, job_description=None, structure_data=None):
+    return apply_job_description(score_resume_base(resume_text, structure_data), job_description)
+
+def analyze_upload(source, filename, digest=None):
+    """
+    Parses and base-scores an uploaded resume, reusing cached results for
+    identical bytes. `source` is raw bytes, or a seekable binary stream
+    together with its sha256 `digest`.
+    Returns (parsed, base) or None for unsupported formats;
+    base is None when no text could be extracted.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        digest = digest or content_hash(source)
+        source = io.BytesIO(source)
+    key = digest + os.path.splitext(filename)[1].lower()
+
+    parsed = parsed_cache.get(key)
+    if parsed is None:
+        result = parse_document(source, filename)
+        if result is None:
+            return None
+        parsed = {'text': result[0], 'structure': result[1]}
+        parsed_cache.set(key, parsed)
+
+    base = score_cache.get(key)
+    if base is None and parsed['text']:
+        base = score_resume_base(parsed['text'], parsed['structure'])
+        score_cache.set(key, base)
+
+    return parsed, base
+
 @ats.route('/ats-checker', methods=['GET', 'POST'])
 @login_required
 def ats_checker():
@@ -273,23 +350,127 @@ def ats_checker():
         resume_file = request.files.get('resume_file')
         
         if resume_file and resume_file.filename != '':
-            filename = resume_file.filename.lower()
-            file_copy = io.BytesIO(resume_file.read())
-            resume_file.seek(0)
-            
-            structure_data = None
-            if filename.endswith('.pdf'):
-                resume_text = extract_text_from_pdf(file_copy)
-                structure_data = get_pdf_structure(file_copy)
-            elif filename.endswith('.docx'):
-                resume_text = extract_text_from_docx(file_copy)
-                structure_data = get_docx_structure(file_copy)
-            else:
+            ext = os.path.splitext(resume_file.filename)[1].lower()
+            if ext not in SUPPORTED_EXTENSIONS:
                 flash('Unsupported format.', 'danger')
-        
+                return render_template('resume/ats.html', report=None, resume_text="", job_desc=job_desc)
+
+            # One pass writes the upload for the job pool and hashes it
+            path = job_upload_path(ext)
+            try:
+                digest, _ = save_upload(resume_file, path)
+            except UploadTooLarge as e:
+                flash(str(e), 'danger')
+                return render_template('resume/ats.html', report=None, resume_text="", job_desc=job_desc)
+
+            analysis = cached_analysis(digest, resume_file.filename)
+            if analysis is None:
+                # Not seen before: parse in the job pool, off the request path
+                job_id = submit_job('ats_score', score_uploaded_file, path, resume_file.filename, digest, job_desc,
+                                    on_done=_link_ats_report, upload=path)
+                return redirect(url_for('jobs.wait', job_id=job_id))
+            os.remove(path)
+
+            parsed, base = analysis
+            resume_text = parsed['text']
             if resume_text:
-                report = calculate_ats_score(resume_text, job_desc, structure_data)
+                report = apply_job_description(base, job_desc)
             else:
                 flash('Please upload a resume.', 'warning')
     
     return render_template('resume/ats.html', report=report, resume_text=resume_text, job_desc=job_desc)
+
+def cached_analysis(digest, filename):
+    """Returns (parsed, base) when this upload was already parsed and scored."""
+    key = digest + os.path.splitext(filename)[1].lower()
+    parsed = parsed_cache.get(key)
+    base = score_cache.get(key)
+    if parsed is None or (base is None and parsed['text']):
+        return None
+    return parsed, base
+
+def score_uploaded_file(path, filename, digest, job_desc):
+    """
+    Job worker: parses and scores a saved upload (the job pool deletes it).
+    Also returns the parse and base score so the web process can cache
+    them; the worker's own caches are invisible to it.
+    """
+    with open(path, 'rb') as f:
+        analysis = analyze_upload(f, filename, digest)
+
+    if analysis is None:
+        return {'error': 'Unsupported format.'}
+    parsed, base = analysis
+    cached = {'cache_key': digest + os.path.splitext(filename)[1].lower(), 'parsed': parsed, 'base': base}
+    if base is None:
+        return dict(cached, error='Could not extract text from file.')
+    return dict(
+        cached,
+        report=apply_job_description(base, job_desc),
+        resume_text=parsed['text'],
+        job_desc=job_desc
+    )
+
+def _link_ats_report(job, result):
+    # Runs in the web process: keep the analysis so a new job description
+    # for the same file is answered inline
+    key = result.pop('cache_key', None)
+    parsed, base = result.pop('parsed', None), result.pop('base', None)
+    if key and parsed is not None:
+        parsed_cache.set(key, parsed)
+        if base is not None:
+            score_cache.set(key, base)
+
+    if 'error' in result:
+        raise JobFailed(result['error'])
+    result.update(redirect_to('ats.ats_report', job_id=job.id))
+    return result
+
+@ats.route('/ats-checker/report/<job_id>')
+@login_required
+def ats_report(job_id):
+    job = get_user_job(job_id)
+    if job.status != 'done':
+        return redirect(url_for('jobs.wait', job_id=job_id))
+    return render_template('resume/ats.html', report=job.result['report'],
+                           resume_text=job.result['resume_text'], job_desc=job.result['job_desc'])
+
+@ats.route('/ats-checker/batch', methods=['POST'])
+@login_required
+def ats_checker_batch():
+    """
+    Scores a zip archive (resume_zip) or several files (resume_files) against
+    one job description and streams one JSON object per line as files finish.
+    """
+    from .ats_batch import score_batch
+
+    job_desc = request.form.get('job_desc', '')
+    archive = request.files.get('resume_zip')
+    files = [f for f in request.files.getlist('resume_files') if f.filename]
+    if not (archive and archive.filename) and not files:
+        return {"error": "Upload a zip archive or one or more resume files."}, 400
+
+    work_dir = tempfile.mkdtemp(prefix='ats_batch_')
+    try:
+        if archive and archive.filename:
+            target = os.path.join(work_dir, 'batch.zip')
+            archive.save(target)
+        else:
+            target = work_dir
+            for i, f in enumerate(files):
+                file_dir = os.path.join(work_dir, str(i))
+                os.makedirs(file_dir)
+                f.save(os.path.join(file_dir, secure_filename(f.filename) or 'resume'))
+    except BaseException:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    def generate():
+        # Runs on the shared job pool so concurrent batches don't each fork a pool
+        for result in score_batch(target, job_desc, workers=job_pool_size(), pool=get_job_pool()):
+            yield json.dumps(result) + "\n"
+
+    response = Response(generate(), mimetype='application/x-ndjson')
+    # Runs even if the client disconnects before or during the stream
+    response.call_on_close(lambda: shutil.rmtree(work_dir, ignore_errors=True))
+    return response
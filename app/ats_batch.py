@@ -0,0 +1,111 @@
+"""
+Bulk ATS scoring for a directory or zip archive of resumes.
+
+Files are parsed and scored in a process pool because pdfminer layout
+analysis is CPU-bound and does not scale across threads. Results are
+yielded one dict per file as soon as each finishes, ready to be written
+out as JSON Lines.
+
+Each file is held to the single-upload limit (RESUME_MAX_BYTES) after
+decompression, so a zip bomb cannot exhaust worker memory.
+"""
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from .uploads import MAX_UPLOAD_BYTES, UploadTooLarge
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+# Processes per batch when no pool is shared in
+BATCH_WORKERS = int(os.getenv('ATS_BATCH_WORKERS', 2))
+
+
+def iter_resume_sources(path):
+    """
+    Yields (source, member, size) tuples: (file_path, None, size) for a
+    directory or (zip_path, member_name, uncompressed_size) for a zip archive.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                    yield path, info.filename, info.file_size
+        return
+
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                file_path = os.path.join(root, name)
+                yield file_path, None, os.path.getsize(file_path)
+
+
+def _read_bounded(stream, max_bytes):
+    # The declared size of a zip member can lie; never read past the limit
+    data = stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise UploadTooLarge(f"File exceeds {max_bytes // (1024 * 1024)} MB limit.")
+    return data
+
+
+def score_source(source, member, job_description):
+    """
+    Worker entry point: reads one resume and returns its ATS report.
+    """
+    from .ats import analyze_upload, apply_job_description
+
+    name = member or os.path.basename(source)
+    try:
+        if member:
+            with zipfile.ZipFile(source) as archive, archive.open(member) as f:
+                data = _read_bounded(f, MAX_UPLOAD_BYTES)
+        else:
+            with open(source, 'rb') as f:
+                data = _read_bounded(f, MAX_UPLOAD_BYTES)
+
+        analysis = analyze_upload(data, name)
+        if analysis is None:
+            return {'file': name, 'error': 'Unsupported format.'}
+
+        parsed, base = analysis
+        if base is None:
+            return {'file': name, 'error': 'Could not extract text from file.'}
+
+        return {'file': name, 'report': apply_job_description(base, job_description)}
+    except Exception as e:
+        return {'file': name, 'error': str(e)}
+
+
+def score_batch(path, job_description=None, workers=None, pool=None):
+    """
+    Scores every resume under `path` and yields result dicts in completion
+    order. At most 2 x workers files are in flight at any time.
+
+    Pass `pool` to run on a shared executor (the web app uses the job pool,
+    so concurrent batches do not each start their own processes); otherwise
+    a pool of `workers` processes (default ATS_BATCH_WORKERS) is created.
+    """
+    workers = workers or BATCH_WORKERS
+    if pool is not None:
+        yield from _score_on(pool, path, job_description, workers)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as own_pool:
+        yield from _score_on(own_pool, path, job_description, workers)
+
+
+def _score_on(pool, path, job_description, workers):
+    pending = set()
+    for source, member, size in iter_resume_sources(path):
+        if size > MAX_UPLOAD_BYTES:
+            yield {'file': member or os.path.basename(source),
+                   'error': f"File exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit."}
+            continue
+        pending.add(pool.submit(score_source, source, member, job_description))
+        if len(pending) >= workers * 2:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
@@ -1,32 +1,37 @@
-
-import docx
-from pdfminer.high_level import extract_pages
-from pdfminer.layout import LTTextBox, LTChar
+# pdfminer and python-docx are imported on first parse, not at app startup
 import io
 
-def get_pdf_structure(file_stream):
+def parse_pdf(file_stream):
     """
-    Extracts text with font and coordinate info from PDF.
+    Extracts plain text plus per-line font and coordinate info from a PDF
+    in a single pdfminer layout pass.
+    Returns (text, structure).
     """
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextBox, LTChar
+
+    pages = []
     structure = []
     try:
         # Seek to beginning in case stream was read before
         file_stream.seek(0)
         for page_layout in extract_pages(file_stream):
+            page_text = []
             for element in page_layout:
                 if isinstance(element, LTTextBox):
+                    page_text.append(element.get_text())
                     for line in element:
                         line_text = line.get_text().strip()
                         if not line_text:
                             continue
-                            
+
                         sizes = []
                         fonts = []
                         for char in line:
                             if isinstance(char, LTChar):
                                 sizes.append(char.size)
                                 fonts.append(char.fontname)
-                        
+
                         if sizes:
                             structure.append({
                                 'text': line_text,
@@ -35,23 +40,30 @@ def get_pdf_structure(file_stream):
                                 'size': sum(sizes) / len(sizes),
                                 'font': fonts[0] if fonts else "Unknown"
                             })
+            pages.append("".join(page_text))
     except Exception as e:
-        print(f"PDF Structure extraction error: {e}")
-    return structure
+        print(f"PDF parsing error: {e}")
+    return "\n".join(pages), structure
 
-def get_docx_structure(file_stream):
+def parse_docx(file_stream):
     """
-    Extracts structure from DOCX.
+    Extracts plain text and paragraph structure from a DOCX opened once.
+    Returns (text, structure).
     """
+    import docx
+
+    text = ""
     structure = []
     try:
         file_stream.seek(0)
         doc = docx.Document(file_stream)
         for para in doc.paragraphs:
-            text = para.text.strip()
-            if not text:
+            text += para.text + "\n"
+
+            stripped = para.text.strip()
+            if not stripped:
                 continue
-                
+
             # Heuristic for size/font in docx
             # We take the first run's properties as representative
             size = 11.0 # default
@@ -62,9 +74,9 @@ def get_docx_structure(file_stream):
                     size = run.font.size.pt
                 if run.font.name:
                     font = run.font.name
-            
+
             structure.append({
-                'text': text,
+                'text': stripped,
                 'x': 0, # docx doesn't give coords easily, but we can detect indentation
                 'y': 0,
                 'size': size,
@@ -72,5 +84,17 @@ def get_docx_structure(file_stream):
                 'alignment': para.alignment
             })
     except Exception as e:
-        print(f"DOCX Structure extraction error: {e}")
-    return structure
+        print(f"DOCX parsing error: {e}")
+    return text, structure
+
+def parse_document(file_stream, filename):
+    """
+    Dispatches on file extension. Returns (text, structure), or None for
+    unsupported formats.
+    """
+    filename = filename.lower()
+    if filename.endswith('.pdf'):
+        return parse_pdf(file_stream)
+    if filename.endswith('.docx'):
+        return parse_docx(file_stream)
+    return None
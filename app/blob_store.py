@@ -0,0 +1,147 @@
+"""
+Content-addressed storage for uploaded resume files.
+
+Each distinct file is written once to uploads/blobs/<ab>/<sha256> and
+tracked by a ResumeBlob row whose ref_count is the number of resumes
+pointing at it. Resumes keep the hash in content['blob_sha']; uploads
+saved before this store existed keep their uploads/resumes file name
+and are still served from there.
+
+Files of released blobs are only deleted once the releasing transaction
+commits, so a failed commit never leaves a row pointing at nothing.
+"""
+import os
+import uuid
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import db
+from .models import ResumeBlob
+from .uploads import save_upload
+
+# session.info key for blob hashes whose files go once the session commits
+PENDING_DELETES = 'blob_store.pending_deletes'
+
+UPLOAD_ROOT = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
+BLOB_ROOT = os.path.join(UPLOAD_ROOT, 'blobs')
+LEGACY_ROOT = os.path.join(UPLOAD_ROOT, 'resumes')
+
+
+def blob_path(sha):
+    return os.path.join(BLOB_ROOT, sha[:2], sha)
+
+
+def store(file, ext):
+    """
+    Streams an uploaded FileStorage into the store and takes a reference
+    on it. Returns the sha256. Raises UploadTooLarge from save_upload.
+    The caller commits the session.
+    """
+    tmp_dir = os.path.join(BLOB_ROOT, 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+    sha, size = save_upload(file, tmp_path)
+
+    try:
+        _add_reference(sha, size, ext)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    # The reference write above holds SQLite's write lock until commit, so a
+    # concurrent _delete_released_files() has either finished or waits for us
+    path = blob_path(sha)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+    return sha
+
+
+def _add_reference(sha, size, ext):
+    updated = ResumeBlob.query.filter_by(sha256=sha).update(
+        {ResumeBlob.ref_count: ResumeBlob.ref_count + 1}, synchronize_session=False
+    )
+    if updated:
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(ResumeBlob(sha256=sha, size=size, ext=ext, ref_count=1))
+    except IntegrityError:
+        # Another request stored the same file first
+        ResumeBlob.query.filter_by(sha256=sha).update(
+            {ResumeBlob.ref_count: ResumeBlob.ref_count + 1}, synchronize_session=False
+        )
+
+
+def release(sha):
+    """
+    Drops one reference; the file is deleted with its last reference once
+    the caller commits the session.
+    """
+    ResumeBlob.query.filter_by(sha256=sha).update(
+        {ResumeBlob.ref_count: ResumeBlob.ref_count - 1}, synchronize_session=False
+    )
+    blob = db.session.get(ResumeBlob, sha, populate_existing=True)
+    if blob is None or blob.ref_count > 0:
+        return
+
+    db.session.delete(blob)
+    db.session.info.setdefault(PENDING_DELETES, set()).add(sha)
+
+
+@db.event.listens_for(Session, 'after_commit')
+def _delete_released_files(session):
+    if session.in_nested_transaction():
+        # A SAVEPOINT committed; wait for the outer transaction
+        return
+    shas = session.info.pop(PENDING_DELETES, None)
+    if not shas:
+        return
+
+    table = ResumeBlob.__table__
+    with db.engine.begin() as conn:
+        # A (no-op) write takes SQLite's write lock so no store() can add a
+        # reference between the check below and the file removal
+        conn.execute(table.delete().where(table.c.sha256.in_(shas), table.c.ref_count <= 0))
+        # Blobs uploaded again since the release are live and keep their file
+        live = set(conn.scalars(select(table.c.sha256).where(table.c.sha256.in_(shas))))
+        for sha in shas - live:
+            try:
+                os.remove(blob_path(sha))
+            except OSError:
+                pass
+
+
+@db.event.listens_for(Session, 'after_rollback')
+def _forget_released_files(session):
+    if not session.in_nested_transaction():
+        session.info.pop(PENDING_DELETES, None)
+
+
+def resume_file(content):
+    """
+    Returns (path, etag) for an uploaded resume's content dict, or
+    (None, None) when it has no file. Legacy files have no etag.
+    """
+    if content.get('blob_sha'):
+        return blob_path(content['blob_sha']), content['blob_sha']
+    if content.get('uploaded_file'):
+        return os.path.join(LEGACY_ROOT, content['uploaded_file']), None
+    return None, None
+
+
+def release_resume_file(content):
+    """Releases the blob (or deletes the legacy file) behind a content dict."""
+    if content.get('blob_sha'):
+        release(content['blob_sha'])
+        return
+
+    path, _ = resume_file(content)
+    if path and os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,130 @@
+"""
+Small thread-safe LRU cache with an optional on-disk JSON tier.
+
+The memory tier is bounded by entry count and, when max_bytes is given, by
+the total JSON-encoded size of its values. When a disk directory is given,
+entries are also written as <key>.json files so they survive restarts and
+are shared between worker processes; the disk tier is bounded the same way
+(max_disk_entries, max_disk_bytes), dropping the least recently used files
+first.
+"""
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class LRUCache:
+    def __init__(self, max_entries=128, disk_dir=None, max_disk_entries=1000, max_bytes=None, max_disk_bytes=None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        # Keys may contain separators; hash them into a safe file name
+        return os.path.join(self.disk_dir, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    payload = f.read()
+                value = json.loads(payload)
+                os.utime(path)  # mark as recently used
+            except (OSError, ValueError):
+                return default
+            self._remember(key, value, len(payload))
+            return value
+
+        return default
+
+    def set(self, key, value):
+        payload = None
+        if self.disk_dir or self.max_bytes is not None:
+            try:
+                payload = json.dumps(value, default=str)
+            except (TypeError, ValueError) as e:
+                print(f"Cache encode failed: {e}")
+                return
+        self._remember(key, value, len(payload) if payload is not None else 0)
+        if self.disk_dir:
+            self._write_disk(key, payload)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, value, size):
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Would evict everything else and still not fit
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self._total_bytes > self.max_bytes):
+                stale, _ = self._entries.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(stale)
+
+    def _write_disk(self, key, payload):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Cache disk write failed: {e}")
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        files = []
+        total = 0
+        for entry in os.scandir(self.disk_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        files.sort()
+        while files and (len(files) > self.max_disk_entries or (
+                self.max_disk_bytes is not None and total > self.max_disk_bytes)):
+            _, size, stale = files.pop(0)
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+            total -= size
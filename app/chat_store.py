@@ -0,0 +1,83 @@
+"""
+Server-side chatbot conversation history.
+
+The session cookie only carries a chat id; messages live in the
+ChatMessage table with an in-process LRU in front. Each lookup costs one
+index-only "latest message id" query, so a worker whose cached copy is
+stale (another worker appended since) reloads from SQLite.
+
+Only the last MAX_MESSAGES messages of a conversation are kept, and
+messages older than CHAT_HISTORY_MAX_AGE days are purged.
+"""
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from . import db
+from .cache import LRUCache
+from .models import ChatMessage
+
+MAX_MESSAGES = 10
+MAX_AGE = timedelta(days=int(os.getenv('CHAT_HISTORY_MAX_AGE', 30)))
+
+_cache = LRUCache(max_entries=int(os.getenv('CHAT_HISTORY_CACHE_SIZE', 1000)))
+
+
+def _latest_id(chat_id):
+    return db.session.query(func.max(ChatMessage.id)).filter(ChatMessage.chat_id == chat_id).scalar()
+
+
+def has_history(chat_id):
+    return _latest_id(chat_id) is not None
+
+
+def history(chat_id):
+    """
+    Returns the conversation as a list of {"role", "content"} dicts,
+    oldest first.
+    """
+    latest_id = _latest_id(chat_id)
+    if latest_id is None:
+        return []
+
+    cached = _cache.get(chat_id)
+    if cached and cached[0] == latest_id:
+        return list(cached[1])
+
+    rows = (
+        ChatMessage.query
+        .filter(ChatMessage.chat_id == chat_id)
+        .order_by(ChatMessage.id.desc())
+        .limit(MAX_MESSAGES)
+        .all()
+    )
+    messages = [{"role": m.role, "content": m.content} for m in reversed(rows)]
+    _cache.set(chat_id, (latest_id, messages))
+    return list(messages)
+
+
+def append_exchange(chat_id, user_query, answer):
+    messages = history(chat_id)
+    rows = [
+        ChatMessage(chat_id=chat_id, role="user", content=user_query),
+        ChatMessage(chat_id=chat_id, role="assistant", content=answer)
+    ]
+    db.session.add_all(rows)
+    db.session.flush()
+
+    # Keep last MAX_MESSAGES
+    cutoff = (
+        db.session.query(ChatMessage.id)
+        .filter(ChatMessage.chat_id == chat_id)
+        .order_by(ChatMessage.id.desc())
+        .offset(MAX_MESSAGES - 1)
+        .limit(1)
+        .scalar()
+    )
+    if cutoff is not None:
+        ChatMessage.query.filter(ChatMessage.chat_id == chat_id, ChatMessage.id < cutoff).delete(synchronize_session=False)
+
+    ChatMessage.query.filter(ChatMessage.created_at < datetime.utcnow() - MAX_AGE).delete(synchronize_session=False)
+    db.session.commit()
+
+    messages.extend({"role": m.role, "content": m.content} for m in rows)
+    _cache.set(chat_id, (rows[-1].id, messages[-MAX_MESSAGES:]))
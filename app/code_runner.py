@@ -0,0 +1,595 @@
+"""
+Execution backends for the online compiler.
+
+Every backend exposes the same three calls and returns results in the
+Judge0 shape (stdout, stderr, compile_output, status, time, memory):
+
+- run(language, source_code, stdin)    -> result
+- submit(language, source_code, stdin) -> token
+- result(token)                        -> (result, pending)
+
+Judge0Backend talks to a Judge0 instance over a pooled HTTP session.
+LocalBackend compiles and runs code in resource-limited subprocesses on
+this machine (Linux only) and needs the toolchains on PATH. Pick one with
+COMPILER_BACKEND=judge0|local (default judge0).
+
+LocalBackend is not a sandbox: rlimits bound CPU, memory, file size and
+process count, and a root server drops the program to COMPILER_RUN_UID
+(default nobody), but the program can still read any file that uid can
+and use the network. It is refused unless COMPILER_ALLOW_LOCAL=1, which
+should only be set where that is acceptable (e.g. inside a container
+holding nothing but this app's toolchains).
+
+get_backend() wraps the chosen backend in CachingBackend, which replays
+results for identical (language, source, stdin) and compile errors for
+identical (language, source); callers check cached() before submitting so
+a hit is answered without a token. LocalBackend additionally keeps
+compiled binaries on disk so a new stdin skips straight to the run step,
+and keeps submission state in files under COMPILER_JOBS_DIR so any worker
+process can answer a poll.
+"""
+import os
+import sys
+import json
+import uuid
+import re
+import hashlib
+import shutil
+import signal
+import time
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from .cache import LRUCache
+
+# Language IDs for Judge0 CE
+LANGUAGE_IDS = {
+    "c": 75,          # GCC 11.4.0
+    "cpp": 76,        # GCC 11.4.0
+    "java": 91,       # OpenJDK 17
+    "python": 92,     # Python 3.11.2
+    "javascript": 93  # Node.js 18.15.0
+}
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'compiler_cache')
+DEFAULT_JOBS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'compiler_jobs')
+
+
+class ExecutionError(Exception):
+    pass
+
+
+def _source_key(language, source_code, stdin=None):
+    return hashlib.sha256(json.dumps([language, source_code, stdin]).encode()).hexdigest()
+
+
+# ===============================
+# Judge0
+# ===============================
+class Judge0Backend:
+    # Judge0 status ids that mean the submission has not finished yet
+    PENDING_STATUS_IDS = {1, 2}  # In Queue, Processing
+
+    def __init__(self, base_url="https://ce.judge0.com", pool_size=20):
+        self.run_url = f"{base_url}/submissions?base64_encoded=false&wait=true"
+        self.submit_url = f"{base_url}/submissions?base64_encoded=false&wait=false"
+        self.result_url = base_url + "/submissions/{token}?base64_encoded=false&fields=stdout,stderr,compile_output,status,time,memory"
+
+        # One keep-alive connection pool shared by every request in this worker
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @staticmethod
+    def _payload(language, source_code, stdin):
+        return {
+            "source_code": source_code,
+            "language_id": LANGUAGE_IDS[language],
+            "stdin": stdin
+        }
+
+    @staticmethod
+    def _format(result):
+        # stdout, stderr, compile_output are initially null if not present
+        return {
+            "stdout": result.get("stdout") or "",
+            "stderr": result.get("stderr") or "",
+            "compile_output": result.get("compile_output") or "",
+            "status": (result.get("status") or {}).get("description", "Unknown"),
+            "time": result.get("time"), # in seconds
+            "memory": result.get("memory") # in KB
+        }
+
+    def run(self, language, source_code, stdin):
+        response = self.session.post(self.run_url, json=self._payload(language, source_code, stdin), timeout=15)
+        if response.status_code not in [200, 201]:
+            raise ExecutionError(f"Judge0 API Error: {response.status_code}")
+        return self._format(response.json())
+
+    def submit(self, language, source_code, stdin):
+        response = self.session.post(self.submit_url, json=self._payload(language, source_code, stdin), timeout=10)
+        if response.status_code not in [200, 201]:
+            raise ExecutionError(f"Judge0 API Error: {response.status_code}")
+        return response.json().get("token")
+
+    def result(self, token):
+        response = self.session.get(self.result_url.format(token=token), timeout=10)
+        if response.status_code != 200:
+            raise ExecutionError(f"Judge0 API Error: {response.status_code}")
+        result = response.json()
+        pending = (result.get("status") or {}).get("id") in self.PENDING_STATUS_IDS
+        return self._format(result), pending
+
+
+# ===============================
+# Local execution
+# ===============================
+# file: source file name; compile/run: argv run inside the temp dir.
+# limit_memory=False for runtimes that reserve large virtual address space
+# up front (JVM, V8) and fail under RLIMIT_AS; Java gets -Xmx instead.
+LOCAL_LANGUAGES = {
+    "c": {"file": "main.c", "compile": ["gcc", "main.c", "-O2", "-o", "main", "-lm"], "run": ["./main"]},
+    "cpp": {"file": "main.cpp", "compile": ["g++", "main.cpp", "-O2", "-o", "main"], "run": ["./main"]},
+    "java": {"file": "Main.java", "compile": ["javac", "Main.java"], "run": ["java", "-Xmx256m", "-cp", ".", "Main"], "limit_memory": False},
+    "python": {"file": "main.py", "run": [sys.executable, "main.py"]},
+    "javascript": {"file": "main.js", "run": ["node", "main.js"], "limit_memory": False}
+}
+
+CPU_TIME_LIMIT = 5          # seconds per run
+COMPILE_CPU_TIME_LIMIT = 15 # seconds per compile
+MEMORY_LIMIT = 256 * 1024 * 1024
+COMPILE_MEMORY_LIMIT = 1024 * 1024 * 1024
+FILE_SIZE_LIMIT = 1024 * 1024
+# Processes/threads per uid; counts the whole uid, so with no run uid it includes the server's own
+PROCESS_LIMIT = 256
+OUTPUT_LIMIT = 64 * 1024    # bytes kept per stream
+MEMORY_SAMPLE_INTERVAL = 0.005  # seconds
+JOB_STATE_TTL = 600  # seconds an unclaimed submission state file is kept
+TOKEN_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+def _peak_rss_kb(pid, program):
+    """
+    VmHWM of pid in KB, or None if it is gone or has not exec'd `program` yet.
+    """
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            if f.read().split(b"\0")[0] != os.fsencode(program):
+                return None
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _apply_limits(cpu_seconds, memory_bytes):
+    import resource
+
+    def preexec():
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (FILE_SIZE_LIMIT, FILE_SIZE_LIMIT))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        resource.setrlimit(resource.RLIMIT_NPROC, (PROCESS_LIMIT, PROCESS_LIMIT))
+        if memory_bytes:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    return preexec
+
+
+def _default_run_uid():
+    """
+    COMPILER_RUN_UID, else nobody (65534) when the server runs as root.
+    None means programs run as the server's own user.
+    """
+    uid = os.getenv("COMPILER_RUN_UID")
+    if uid:
+        return int(uid)
+    return 65534 if os.geteuid() == 0 else None
+
+
+def _execute(argv, cwd, stdin, cpu_seconds, memory_bytes, run_uid=None):
+    """
+    Runs argv under rlimits in its own process group, as run_uid if given.
+    Returns a dict with stdout, stderr, exit_code, signal, timed_out, time
+    (CPU seconds) and memory (sampled peak RSS in KB, None if the program
+    exited too fast).
+    """
+    env = {"PATH": os.environ.get("PATH", "/usr/bin:/bin"), "HOME": cwd, "LANG": "C.UTF-8"}
+    identity = {}
+    if run_uid is not None:
+        # Root ignores RLIMIT_NPROC, so dropping privileges is what makes it bind
+        identity = {"user": run_uid, "group": run_uid, "extra_groups": []}
+    proc = subprocess.Popen(
+        argv, cwd=cwd, env=env,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        preexec_fn=_apply_limits(cpu_seconds, memory_bytes),
+        start_new_session=True,
+        **identity
+    )
+
+    streams = {}
+
+    def pump(name, stream):
+        streams[name] = stream.read(OUTPUT_LIMIT)
+        while stream.read(65536):  # drain so the child never blocks on a full pipe
+            pass
+        stream.close()
+
+    def feed():
+        try:
+            proc.stdin.write(stdin.encode())
+        except (BrokenPipeError, OSError):
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    threads = [
+        threading.Thread(target=pump, args=("stdout", proc.stdout), daemon=True),
+        threading.Thread(target=pump, args=("stderr", proc.stderr), daemon=True),
+        threading.Thread(target=feed, daemon=True)
+    ]
+    for t in threads:
+        t.start()
+
+    # Wall-clock guard for programs that sleep or block instead of burning CPU
+    timer = threading.Timer(cpu_seconds * 2, kill)
+    timer.start()
+
+    # ru_maxrss from wait4 includes the RSS of this (forking) worker, so the
+    # program's own peak is sampled from /proc while it runs instead.
+    memory = None
+    while True:
+        pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        sample = _peak_rss_kb(proc.pid, argv[0])
+        if sample is not None:
+            memory = sample
+        time.sleep(MEMORY_SAMPLE_INTERVAL)
+    timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    # Take down anything the program left running so the pipes close
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    for t in threads:
+        t.join()
+
+    term_signal = -proc.returncode if proc.returncode < 0 else None
+    return {
+        "stdout": streams.get("stdout", b"").decode(errors="replace"),
+        "stderr": streams.get("stderr", b"").decode(errors="replace"),
+        "exit_code": proc.returncode,
+        "signal": term_signal,
+        "timed_out": timed_out.is_set() or term_signal == signal.SIGXCPU,
+        "time": usage.ru_utime + usage.ru_stime,
+        "memory": memory
+    }
+
+
+def _status_for(run):
+    if run["timed_out"]:
+        return "Time Limit Exceeded"
+    if run["signal"]:
+        return f"Runtime Error ({signal.Signals(run['signal']).name})"
+    if run["exit_code"] != 0:
+        return "Runtime Error (NZEC)"
+    return "Accepted"
+
+
+class ArtifactCache:
+    """
+    Compiled build directories on disk, keyed by hash of (language, source).
+    Failed compiles are kept too, as just their compiler output. Entries are
+    evicted least recently used first once the total size exceeds max_bytes.
+    """
+    META = "compile.json"
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def load(self, key, workdir):
+        """
+        Copies a cached build into workdir. Returns (ok, compile_output),
+        or None on a miss.
+        """
+        path = os.path.join(self.root, key)
+        try:
+            with open(os.path.join(path, self.META), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            shutil.copytree(path, workdir, dirs_exist_ok=True, ignore=shutil.ignore_patterns(self.META))
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+        return meta["ok"], meta["compile_output"]
+
+    def store(self, key, workdir, ok, compile_output):
+        final = os.path.join(self.root, key)
+        staging = os.path.join(self.root, f".{key}.{uuid.uuid4().hex}")
+        try:
+            if ok:
+                shutil.copytree(workdir, staging)
+            else:
+                os.makedirs(staging)
+            with open(os.path.join(staging, self.META), "w", encoding="utf-8") as f:
+                json.dump({"ok": ok, "compile_output": compile_output}, f)
+            os.rename(staging, final)
+        except OSError:
+            # Another worker stored the same build first, or the disk is full
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.root):
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(dirpath, name))
+                for dirpath, _, names in os.walk(entry.path) for name in names
+            )
+            entries.append((entry.stat().st_mtime, size, entry.path))
+            total += size
+
+        entries.sort()
+        while total > self.max_bytes and entries:
+            _, size, path = entries.pop(0)
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+class LocalBackend:
+    def __init__(self, max_workers=None, artifacts=None, run_uid=None, jobs_dir=DEFAULT_JOBS_DIR):
+        self.artifacts = artifacts
+        self.run_uid = run_uid
+        self.jobs_dir = jobs_dir
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1, thread_name_prefix='code-runner')
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def compile(self, language, source_code, workdir):
+        """
+        Writes the source into workdir and compiles it if the language needs
+        it. Returns (ok, compile_output).
+        """
+        spec = LOCAL_LANGUAGES[language]
+        with open(os.path.join(workdir, spec["file"]), "w", encoding="utf-8") as f:
+            f.write(source_code)
+
+        if "compile" not in spec:
+            return True, ""
+
+        compiled = _execute(spec["compile"], workdir, "", COMPILE_CPU_TIME_LIMIT,
+                            COMPILE_MEMORY_LIMIT if spec.get("limit_memory", True) else None, self.run_uid)
+        output = compiled["stdout"] + compiled["stderr"]
+        return compiled["exit_code"] == 0, output
+
+    def execute(self, language, workdir, stdin):
+        spec = LOCAL_LANGUAGES[language]
+        run = _execute(spec["run"], workdir, stdin, CPU_TIME_LIMIT,
+                       MEMORY_LIMIT if spec.get("limit_memory", True) else None, self.run_uid)
+        return {
+            "stdout": run["stdout"],
+            "stderr": run["stderr"],
+            "compile_output": "",
+            "status": _status_for(run),
+            "time": f"{run['time']:.3f}",
+            "memory": run["memory"]
+        }
+
+    def _prepare(self, language, source_code, workdir):
+        """
+        Fills workdir with a runnable build, from the artifact cache when the
+        same source was compiled before. Returns (ok, compile_output).
+        """
+        if "compile" not in LOCAL_LANGUAGES[language] or self.artifacts is None:
+            return self.compile(language, source_code, workdir)
+
+        key = _source_key(language, source_code)
+        cached = self.artifacts.load(key, workdir)
+        if cached is not None:
+            return cached
+
+        ok, compile_output = self.compile(language, source_code, workdir)
+        self.artifacts.store(key, workdir, ok, compile_output)
+        return ok, compile_output
+
+    def _run_now(self, language, source_code, stdin):
+        workdir = tempfile.mkdtemp(prefix="studenthub_run_")
+        try:
+            if self.run_uid is not None:
+                # The compiler and program run as run_uid and write their output here
+                os.chown(workdir, self.run_uid, self.run_uid)
+            ok, compile_output = self._prepare(language, source_code, workdir)
+            if not ok:
+                return {
+                    "stdout": "", "stderr": "", "compile_output": compile_output,
+                    "status": "Compilation Error", "time": None, "memory": None
+                }
+            result = self.execute(language, workdir, stdin)
+            result["compile_output"] = compile_output
+            return result
+        except FileNotFoundError as e:
+            return {
+                "stdout": "", "stderr": f"Toolchain not installed on this server: {e.filename}",
+                "compile_output": "", "status": "Internal Error", "time": None, "memory": None
+            }
+        except PermissionError as e:
+            return {
+                "stdout": "", "stderr": f"Toolchain not accessible to the run user: {e.filename}",
+                "compile_output": "", "status": "Internal Error", "time": None, "memory": None
+            }
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def run(self, language, source_code, stdin):
+        # Routed through the pool so concurrent requests share one bound
+        return self._pool.submit(self._run_now, language, source_code, stdin).result()
+
+    # Submission state lives in <jobs_dir>/<token>.json rather than in this
+    # process, since a poll may reach a different web worker than the submit.
+    def _state_path(self, token):
+        return os.path.join(self.jobs_dir, f"{token}.json")
+
+    def _write_state(self, token, state):
+        path = self._state_path(token)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def _run_job(self, token, language, source_code, stdin):
+        self._write_state(token, {"status": "Processing"})
+        try:
+            result = self._run_now(language, source_code, stdin)
+        except Exception as e:
+            result = {
+                "stdout": "", "stderr": f"Execution failed: {e}", "compile_output": "",
+                "status": "Internal Error", "time": None, "memory": None
+            }
+        self._write_state(token, {"status": result["status"], "result": result})
+
+    def _prune_states(self):
+        cutoff = time.time() - JOB_STATE_TTL
+        for entry in os.scandir(self.jobs_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def submit(self, language, source_code, stdin):
+        self._prune_states()
+        token = uuid.uuid4().hex
+        self._write_state(token, {"status": "In Queue"})
+        self._pool.submit(self._run_job, token, language, source_code, stdin)
+        return token
+
+    def result(self, token):
+        if not TOKEN_RE.match(token):
+            raise ExecutionError("Unknown submission token.")
+        path = self._state_path(token)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            raise ExecutionError("Unknown submission token.")
+        if "result" not in state:
+            return {"status": state["status"]}, True
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return state["result"], False
+
+
+# ===============================
+# Result cache
+# ===============================
+class CachingBackend:
+    """
+    Serves repeated submissions from an LRU of finished results. Timeouts
+    and infrastructure errors are never cached since a retry may differ.
+    """
+    UNCACHEABLE_STATUSES = {"Time Limit Exceeded", "Internal Error", "Unknown", "In Queue", "Processing"}
+
+    def __init__(self, backend, results):
+        self.backend = backend
+        self.results = results
+        self._token_keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cached(self, language, source_code, stdin):
+        """The stored result for this submission, or None."""
+        result = self.results.get(_source_key(language, source_code, stdin))
+        if result is None:
+            # A compile error does not depend on stdin
+            result = self.results.get(_source_key(language, source_code))
+        return dict(result) if result is not None else None
+
+    def _remember(self, keys, result):
+        language, source_code, stdin = keys
+        if result.get("status") in self.UNCACHEABLE_STATUSES:
+            return
+        if result.get("status") == "Compilation Error":
+            self.results.set(_source_key(language, source_code), dict(result))
+        else:
+            self.results.set(_source_key(language, source_code, stdin), dict(result))
+
+    def run(self, language, source_code, stdin):
+        cached = self.cached(language, source_code, stdin)
+        if cached is not None:
+            return cached
+        result = self.backend.run(language, source_code, stdin)
+        self._remember((language, source_code, stdin), result)
+        return result
+
+    def submit(self, language, source_code, stdin):
+        # Tokens always belong to the wrapped backend so any worker can resolve them;
+        # serve hits through cached() instead
+        token = self.backend.submit(language, source_code, stdin)
+        with self._lock:
+            self._token_keys[token] = (language, source_code, stdin)
+            while len(self._token_keys) > 1000:
+                self._token_keys.popitem(last=False)
+        return token
+
+    def result(self, token):
+        with self._lock:
+            keys = self._token_keys.get(token)
+
+        result, pending = self.backend.result(token)
+        if not pending and keys:
+            self._remember(keys, result)
+        return result, pending
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            kind = os.getenv("COMPILER_BACKEND", "judge0").lower()
+            if kind == "local":
+                if os.getenv("COMPILER_ALLOW_LOCAL") != "1":
+                    raise ExecutionError("The local code runner is not sandboxed and is disabled; "
+                                         "set COMPILER_ALLOW_LOCAL=1 to enable it.")
+                artifacts = ArtifactCache(
+                    os.getenv("COMPILER_CACHE_DIR", DEFAULT_CACHE_DIR),
+                    int(os.getenv("COMPILER_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+                )
+                backend = LocalBackend(max_workers=int(os.getenv("COMPILER_WORKERS", 0)) or None,
+                                       artifacts=artifacts, run_uid=_default_run_uid(),
+                                       jobs_dir=os.getenv("COMPILER_JOBS_DIR", DEFAULT_JOBS_DIR))
+            else:
+                backend = Judge0Backend(os.getenv("JUDGE0_BASE_URL", "https://ce.judge0.com"))
+            _backend = CachingBackend(backend, LRUCache(int(os.getenv("COMPILER_RESULT_CACHE_SIZE", 512))))
+        return _backend
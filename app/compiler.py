@@ -1,22 +1,24 @@
-import os
-import re
-import requests
-from flask import Blueprint, render_template, request
+import json
+import time
+from flask import Blueprint, render_template, request, Response
 from flask_login import login_required
+from .code_runner import LANGUAGE_IDS, ExecutionError, get_backend
 
 compiler = Blueprint('compiler', __name__)
 
-# Judge0 Community Edition Configuration
-JUDGE0_URL = "https://ce.judge0.com/submissions?base64_encoded=false&wait=true"
+SSE_POLL_INTERVAL = 0.5  # seconds
+SSE_MAX_WAIT = 30  # seconds
+
+
+def _parse_request(data):
+    """
+    Returns (language, source_code, stdin), or None for an unknown language.
+    """
+    language = data.get('language', 'python')
+    if language not in LANGUAGE_IDS:
+        return None
+    return language, data.get('source_code', ''), data.get('stdin', '')
 
-# Language IDs for Judge0 CE
-LANGUAGE_IDS = {
-    "c": 75,          # GCC 11.4.0
-    "cpp": 76,        # GCC 11.4.0
-    "java": 91,       # OpenJDK 17
-    "python": 92,     # Python 3.11.2
-    "javascript": 93  # Node.js 18.15.0
-}
 
 @compiler.route('/compiler')
 @login_required
@@ -27,48 +29,86 @@ def index():
 @compiler.route('/compiler/run', methods=['POST'])
 @login_required
 def run_code():
-    data = request.json
-    source_code = data.get('source_code', '')
-    language_key = data.get('language', 'python')
-    stdin = data.get('stdin', '')
+    parsed = _parse_request(request.json)
+    if not parsed:
+        return {"error": "Invalid language selected"}, 400
+
+    try:
+        return get_backend().run(*parsed)
+    except ExecutionError as e:
+        return {"error": str(e)}, 500
+    except Exception as e:
+        return {"error": f"Execution failed: {str(e)}"}, 500
 
-    language_id = LANGUAGE_IDS.get(language_key)
-    if not language_id:
+@compiler.route('/compiler/submit', methods=['POST'])
+@login_required
+def submit_code():
+    """
+    Queues a submission without waiting for it and returns its token.
+    Fetch the outcome from /compiler/result/<token> or /compiler/stream/<token>.
+    A submission seen before is answered right away as {"result": ...}.
+    """
+    parsed = _parse_request(request.json)
+    if not parsed:
         return {"error": "Invalid language selected"}, 400
 
-    payload = {
-        "source_code": source_code,
-        "language_id": language_id,
-        "stdin": stdin
-    }
+    try:
+        backend = get_backend()
+        cached = backend.cached(*parsed)
+        if cached is not None:
+            return {"result": cached}
+        return {"token": backend.submit(*parsed)}, 202
+    except ExecutionError as e:
+        return {"error": str(e)}, 500
+    except Exception as e:
+        return {"error": f"Submission failed: {str(e)}"}, 500
 
+@compiler.route('/compiler/result/<token>')
+@login_required
+def submission_result(token):
     try:
-        response = requests.post(JUDGE0_URL, json=payload, timeout=15)
-        if response.status_code in [200, 201]:
-            result = response.json()
-            
-            # Extract relevant fields from Judge0 response
-            # stdout, stderr, compile_output are initially null if not present
-            output = result.get("stdout") or ""
-            stderr = result.get("stderr") or ""
-            compile_output = result.get("compile_output") or ""
-            
-            status = result.get("status", {}).get("description", "Unknown")
-            time = result.get("time") # in seconds
-            memory = result.get("memory") # in KB
-
-            return {
-                "stdout": output,
-                "stderr": stderr,
-                "compile_output": compile_output,
-                "status": status,
-                "time": time,
-                "memory": memory
-            }
-        else:
-            return {"error": f"Judge0 API Error: {response.status_code}"}, 500
-            
+        result, pending = get_backend().result(token)
     except Exception as e:
         return {"error": f"Execution failed: {str(e)}"}, 500
 
-    return render_template('compiler/index.html', code=code, output=output, error=error, language=language)
+    if pending:
+        return {"pending": True, "status": result["status"]}, 202
+    return result
+
+@compiler.route('/compiler/stream/<token>')
+@login_required
+def stream_result(token):
+    """
+    Server-sent events: a "status" event while the submission is queued or
+    running, then one "result" (or "error") event with the final output.
+    """
+    backend = get_backend()
+
+    def sse(event, data):
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def generate():
+        deadline = time.monotonic() + SSE_MAX_WAIT
+        last_status = None
+        while True:
+            try:
+                result, pending = backend.result(token)
+            except Exception as e:
+                yield sse("error", {"error": f"Execution failed: {str(e)}"})
+                return
+
+            if not pending:
+                yield sse("result", result)
+                return
+
+            if result["status"] != last_status:
+                last_status = result["status"]
+                yield sse("status", {"status": last_status})
+
+            if time.monotonic() > deadline:
+                yield sse("error", {"error": "Timed out waiting for the result."})
+                return
+            time.sleep(SSE_POLL_INTERVAL)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -2,10 +2,73 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from .models import Event
 from . import db
-from datetime import datetime
+from datetime import datetime, timedelta
 
 events = Blueprint('events', __name__)
 
+# Past events shown per page under the active ones; "Show older" pages further back
+EXPIRED_EVENTS_LIMIT = 20
+
+
+# ===============================
+# DB-SIDE EXPIRY QUERIES
+# ===============================
+def _active_clause(now_utc):
+    # Rows whose time could not be parsed have no due_at and never expire
+    return db.or_(Event.due_at.is_(None), Event.due_at > now_utc)
+
+
+def active_events(user_id, now_utc, limit=None):
+    query = (
+        Event.query
+        .filter(Event.user_id == user_id, _active_clause(now_utc))
+        .order_by(Event.due_at.is_(None), Event.due_at)
+    )
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def active_count(user_id, now_utc):
+    return Event.query.filter(Event.user_id == user_id, _active_clause(now_utc)).count()
+
+
+def upcoming_count(user_id, now_utc, days=7):
+    return Event.query.filter(
+        Event.user_id == user_id,
+        Event.due_at > now_utc,
+        Event.due_at <= now_utc + timedelta(days=days)
+    ).count()
+
+
+def expired_events_page(user_id, now_utc, before=None, limit=EXPIRED_EVENTS_LIMIT):
+    """
+    Expired events newest first, keyset-paginated on (due_at, id).
+    `before` is the (due_at, id) of the last event already shown.
+    Returns (events, next_before), next_before None on the last page.
+    """
+    query = Event.query.filter(Event.user_id == user_id, Event.due_at <= now_utc)
+    if before:
+        before_due, before_id = before
+        query = query.filter(db.or_(
+            Event.due_at < before_due,
+            db.and_(Event.due_at == before_due, Event.id < before_id)
+        ))
+    page = query.order_by(Event.due_at.desc(), Event.id.desc()).limit(limit + 1).all()
+
+    next_before = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_before = (page[-1].due_at, page[-1].id)
+    return page, next_before
+
+
+def _parse_before(args):
+    try:
+        return datetime.fromisoformat(args['before']), int(args['before_id'])
+    except (KeyError, ValueError):
+        return None
+
 @events.route('/events', methods=['GET', 'POST'])
 @login_required
 def index():
@@ -34,8 +97,18 @@ def index():
             
         return redirect(url_for('events.index'))
 
-    user_events = Event.query.filter_by(user_id=current_user.id).order_by(Event.date).all()
-    return render_template('events/index.html', events=user_events)
+    now_utc = datetime.utcnow()
+    upcoming = active_events(current_user.id, now_utc)
+    expired, next_before = expired_events_page(current_user.id, now_utc, _parse_before(request.args))
+    older_url = None
+    if next_before:
+        older_url = url_for('events.index', before=next_before[0].isoformat(), before_id=next_before[1])
+    return render_template('events/index.html',
+                           active_events=upcoming,
+                           expired_events=expired,
+                           active_count=len(upcoming),
+                           older_url=older_url,
+                           paged='before' in request.args)
 
 @events.route('/events/delete/<int:event_id>')
 @login_required
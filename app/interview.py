@@ -1,20 +1,93 @@
-from flask import Blueprint, render_template, request
+from flask import Blueprint, render_template, request, jsonify
 from .models import InterviewQuestion
 from . import db
+import time
+import threading
 
 interview = Blueprint('interview', __name__, url_prefix='/interview')
 
+PAGE_SIZE = 20
+# Seeding runs in its own process, so other workers only see new
+# categories once this expires
+CATEGORY_CACHE_TTL = 300  # seconds
+
+_categories = None  # (list, expires_at)
+_categories_lock = threading.Lock()
+
+
+# ===============================
+# CATEGORY CACHE
+# ===============================
+def get_categories():
+    global _categories
+    now = time.monotonic()
+    with _categories_lock:
+        cached = _categories
+    if cached and cached[1] > now:
+        return cached[0]
+
+    rows = db.session.query(InterviewQuestion.category).distinct().order_by(InterviewQuestion.category).all()
+    categories = [c[0] for c in rows]
+    with _categories_lock:
+        _categories = (categories, now + CATEGORY_CACHE_TTL)
+    return categories
+
+
+def invalidate_categories():
+    global _categories
+    with _categories_lock:
+        _categories = None
+
+
+@db.event.listens_for(InterviewQuestion, 'after_insert')
+@db.event.listens_for(InterviewQuestion, 'after_update')
+@db.event.listens_for(InterviewQuestion, 'after_delete')
+def _invalidate_on_write(mapper, connection, target):
+    invalidate_categories()
+
+
+# ===============================
+# KEYSET PAGINATION
+# ===============================
+def get_question_page(category, after_id=0, limit=PAGE_SIZE):
+    """
+    Returns (questions, next_after) for the page after `after_id`.
+    next_after is None when there are no more questions.
+    """
+    query = InterviewQuestion.query
+    if category != 'All':
+        query = query.filter(InterviewQuestion.category == category)
+    # Fetch one extra row to know whether another page exists
+    rows = query.filter(InterviewQuestion.id > after_id).order_by(InterviewQuestion.id).limit(limit + 1).all()
+    questions = rows[:limit]
+    next_after = questions[-1].id if len(rows) > limit else None
+    return questions, next_after
+
+
 @interview.route('/')
 def index():
     category = request.args.get('category', 'All')
-    if category == 'All':
-        questions = InterviewQuestion.query.all()
-    else:
-        questions = InterviewQuestion.query.filter_by(category=category).all()
-    
-    categories = db.session.query(InterviewQuestion.category).distinct().all()
-    categories = [c[0] for c in categories]
-    if 'All' not in categories:
-        categories.insert(0, 'All')
-        
-    return render_template('interview/index.html', questions=questions, categories=categories, active_category=category)
+    questions, next_after = get_question_page(category)
+
+    categories = ['All'] + [c for c in get_categories() if c != 'All']
+
+    return render_template('interview/index.html', questions=questions, categories=categories,
+                           active_category=category, next_after=next_after)
+
+
+@interview.route('/api/questions')
+def api_questions():
+    category = request.args.get('category', 'All')
+    after_id = request.args.get('after', 0, type=int)
+    questions, next_after = get_question_page(category, after_id)
+
+    return jsonify({
+        'questions': [{
+            'id': q.id,
+            'category': q.category,
+            'question': q.question,
+            'answer': q.answer,
+            'difficulty': q.difficulty
+        } for q in questions],
+        'next_after': next_after
+    })
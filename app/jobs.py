@@ -0,0 +1,241 @@
+"""
+Background jobs for CPU-heavy work kept off the request path.
+
+Resume conversion, ATS parsing and PDF rendering run in a process pool of
+JOB_WORKERS processes (default 2), which bounds how much CPU-bound parsing
+runs at once. Workers come from a forkserver rather than a fork of this
+multithreaded process, so job functions must be importable module-level
+functions. Each job has a Job row; when its process finishes, an
+optional on_done callback runs in this process with the app context (to
+write rows the job produced) and the outcome is stored on the row.
+
+The submitting process stamps heartbeat_at on its unfinished jobs every
+JOB_HEARTBEAT seconds, so any worker can tell a job that is merely waiting
+for a free process from one whose submitter died.
+
+Clients poll /jobs/<id> for JSON status, or open /jobs/<id>/wait, which
+polls and follows the job's redirect once it is done. Jobs are deleted
+JOB_RETENTION_HOURS (default 24) after they finish.
+"""
+import os
+import time
+import uuid
+import threading
+import multiprocessing
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import Blueprint, render_template, url_for
+from flask_login import login_required, current_user
+from . import db
+from .models import Job
+
+jobs = Blueprint('jobs', __name__)
+
+# Uploads handed to jobs; each is deleted when its job finishes
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'job_uploads')
+JOB_HEARTBEAT = int(os.getenv('JOB_HEARTBEAT', 30))
+# Unfinished jobs whose submitter stopped heartbeating this long ago were lost
+STALE_AFTER = timedelta(seconds=JOB_HEARTBEAT * 4)
+# Finished (and lost) jobs are deleted after this long, results included
+JOB_RETENTION = timedelta(hours=int(os.getenv('JOB_RETENTION_HOURS', 24)))
+
+_app = None
+_pool = None
+_pool_lock = threading.Lock()
+_futures = {}  # job id -> Future, for jobs submitted by this process
+_uploads = {}  # job id -> upload path to delete when the job finishes
+_heartbeat = None
+
+
+class JobFailed(Exception):
+    """Raised by on_done callbacks to fail a job with a user-facing message."""
+
+
+def init_app(app):
+    global _app
+    _app = app
+    app.config.setdefault('JOB_WORKERS', int(os.getenv('JOB_WORKERS', 2)))
+
+
+def _get_pool(reset=False):
+    global _pool
+    with _pool_lock:
+        if _pool is None or reset:
+            # Forking a process that runs scheduler, lease and request threads
+            # can copy a held lock into the child and hang the job for good
+            _pool = ProcessPoolExecutor(max_workers=_app.config['JOB_WORKERS'],
+                                        mp_context=multiprocessing.get_context('forkserver'))
+        return _pool
+
+
+def get_pool():
+    """The shared worker pool, for callers that track their own futures (ATS batches)."""
+    return _get_pool()
+
+
+def pool_size():
+    return _app.config['JOB_WORKERS']
+
+
+def upload_path(ext):
+    """A fresh path under UPLOAD_DIR for a file passed to submit(upload=...)."""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    return os.path.join(UPLOAD_DIR, uuid.uuid4().hex + ext)
+
+
+def submit(kind, fn, *args, on_done=None, upload=None):
+    """
+    Queues fn(*args) in the worker pool for the current user and returns
+    the job id. fn must be a module-level function and its result JSON
+    serialisable. on_done(job, result) may transform the result. `upload`
+    is a file the job reads; it is deleted once the job ends, however it ends.
+    """
+    _prune_jobs()
+    now = datetime.utcnow()
+    job = Job(id=uuid.uuid4().hex, user_id=current_user.id, kind=kind, status='queued', heartbeat_at=now)
+    db.session.add(job)
+    db.session.commit()
+
+    if upload:
+        _uploads[job.id] = upload
+    try:
+        try:
+            future = _get_pool().submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a huge PDF); start a fresh pool
+            future = _get_pool(reset=True).submit(fn, *args)
+    except Exception:
+        _remove_upload(job.id)
+        raise
+
+    _futures[job.id] = future
+    _start_heartbeat()
+    future.add_done_callback(lambda f, job_id=job.id: _finish(job_id, f, on_done))
+    return job.id
+
+
+def _remove_upload(job_id):
+    path = _uploads.pop(job_id, None)
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _prune_jobs():
+    """
+    Deletes jobs that finished, or were lost, more than JOB_RETENTION ago,
+    and uploads left behind by jobs whose process died.
+    """
+    cutoff = datetime.utcnow() - JOB_RETENTION
+    Job.query.filter(db.or_(
+        Job.finished_at < cutoff,
+        db.and_(Job.finished_at.is_(None), db.func.coalesce(Job.heartbeat_at, Job.created_at) < cutoff)
+    )).delete(synchronize_session=False)
+
+    if not os.path.isdir(UPLOAD_DIR):
+        return
+    oldest = time.time() - JOB_RETENTION.total_seconds()
+    for entry in os.scandir(UPLOAD_DIR):
+        try:
+            if entry.stat().st_mtime < oldest:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def _finish(job_id, future, on_done):
+    try:
+        with _app.app_context():
+            job = db.session.get(Job, job_id)
+            try:
+                result = future.result()
+                if on_done:
+                    result = on_done(job, result)
+                job.status = 'done'
+                job.result = result
+            except Exception as e:
+                db.session.rollback()
+                job = db.session.get(Job, job_id)
+                job.status = 'failed'
+                job.error = str(e) if isinstance(e, JobFailed) else f"Job failed: {e}"
+                print(f"Job {job_id} ({job.kind}) failed: {e}")
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+    finally:
+        _remove_upload(job_id)
+        _futures.pop(job_id, None)
+
+
+# ===============================
+# Heartbeat
+# ===============================
+def _start_heartbeat():
+    global _heartbeat
+    with _pool_lock:
+        if _heartbeat is None:
+            _heartbeat = threading.Thread(target=_beat, name='job-heartbeat', daemon=True)
+            _heartbeat.start()
+
+
+def _beat():
+    """Stamps this process's unfinished jobs, for as long as the process lives."""
+    while True:
+        time.sleep(JOB_HEARTBEAT)
+        pending = list(_futures.items())
+        if not pending:
+            continue
+        now = datetime.utcnow()
+        started = [job_id for job_id, future in pending if future.running()]
+        try:
+            with _app.app_context():
+                Job.query.filter(Job.id.in_([job_id for job_id, _ in pending]), Job.finished_at.is_(None)) \
+                    .update({'heartbeat_at': now}, synchronize_session=False)
+                if started:
+                    Job.query.filter(Job.id.in_(started), Job.started_at.is_(None)) \
+                        .update({'started_at': now}, synchronize_session=False)
+                db.session.commit()
+        except Exception as e:
+            print(f"⚠️ Job heartbeat failed: {e}")
+
+
+def redirect_to(endpoint, **values):
+    """Result fragment telling the wait page where to go when the job is done."""
+    return {'redirect': {'endpoint': endpoint, 'values': values}}
+
+
+def get_user_job(job_id):
+    return Job.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+
+
+@jobs.route('/jobs/<job_id>')
+@login_required
+def status(job_id):
+    job = get_user_job(job_id)
+
+    state = job.status
+    future = _futures.get(job.id)
+    if state == 'queued':
+        if (future is not None and future.running()) or job.started_at is not None:
+            state = 'running'
+        # Whichever process submitted the job keeps heartbeat_at fresh until it ends
+        last_seen = job.heartbeat_at or job.created_at
+        if future is None and last_seen < datetime.utcnow() - STALE_AFTER:
+            state = 'failed'
+
+    payload = {'id': job.id, 'kind': job.kind, 'status': state, 'error': job.error}
+    redirect = (job.result or {}).get('redirect') if state == 'done' else None
+    if redirect:
+        payload['redirect_url'] = url_for(redirect['endpoint'], **redirect['values'])
+    if state == 'failed' and not job.error:
+        payload['error'] = 'The job was interrupted. Please try again.'
+    return payload
+
+
+@jobs.route('/jobs/<job_id>/wait')
+@login_required
+def wait(job_id):
+    job = get_user_job(job_id)
+    return render_template('jobs/wait.html', job=job)
@@ -0,0 +1,187 @@
+"""
+Leader election so scheduled jobs run in exactly one process.
+
+Every gunicorn worker calls create_app(), but the reminder job must not run
+once per worker. Processes compete for the "scheduler" row in
+scheduler_lease: the holder renews expires_at every SCHEDULER_HEARTBEAT
+seconds, and any process may take the lease once it has expired, so a
+crashed leader is replaced within SCHEDULER_LEASE_TTL seconds. Only the
+leader starts APScheduler; the others stand by and keep trying.
+
+SCHEDULER_MODE selects how a process takes part:
+
+- lease:  compete for the lease as above (default)
+- off:    never run scheduled jobs here, e.g. web workers when a separate
+          run_scheduler.py process is deployed
+- always: run them unconditionally (single-process development)
+"""
+import os
+import time
+import uuid
+import atexit
+import socket
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from . import db
+from .models import SchedulerLease
+
+LEASE_NAME = 'scheduler'
+MODES = ('lease', 'off', 'always')
+
+_mode = None
+_election = None
+
+
+class LeaderElection:
+    def __init__(self, app, name=LEASE_NAME, ttl=90, heartbeat=30, on_elected=None, on_demoted=None):
+        if heartbeat >= ttl:
+            raise ValueError("Lease heartbeat must be shorter than its TTL.")
+        self.app = app
+        self.name = name
+        self.ttl = ttl
+        self.heartbeat = heartbeat
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._renewed_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def try_acquire(self):
+        """
+        Takes or renews the lease in one conditional UPDATE, which SQLite
+        applies atomically. Returns True if this process holds it.
+        """
+        now = datetime.utcnow()
+        with self.app.app_context():
+            if db.session.get(SchedulerLease, self.name) is None:
+                try:
+                    db.session.add(SchedulerLease(name=self.name, expires_at=now))
+                    db.session.commit()
+                except IntegrityError:
+                    # Another process created the row first
+                    db.session.rollback()
+
+            acquired = (
+                SchedulerLease.query
+                .filter(SchedulerLease.name == self.name)
+                .filter(or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at <= now))
+                .update({
+                    'holder': self.holder,
+                    'expires_at': now + timedelta(seconds=self.ttl),
+                    'heartbeat_at': now,
+                }, synchronize_session=False)
+            )
+            db.session.commit()
+        return acquired == 1
+
+    def release(self):
+        """Expires our lease right away so a standby can take over on its next heartbeat."""
+        with self.app.app_context():
+            (
+                SchedulerLease.query
+                .filter_by(name=self.name, holder=self.holder)
+                .update({'expires_at': datetime.utcnow()}, synchronize_session=False)
+            )
+            db.session.commit()
+
+    def _tick(self):
+        try:
+            leader = self.try_acquire()
+        except Exception as e:
+            print(f"⚠️ Scheduler lease heartbeat failed: {e}")
+            # Keep leading only while the last successful renewal is still valid
+            leader = self.is_leader and time.monotonic() - self._renewed_at < self.ttl
+        else:
+            if leader:
+                self._renewed_at = time.monotonic()
+
+        if leader and not self.is_leader:
+            self.is_leader = True
+            print(f"👑 Scheduler lease acquired by {self.holder}")
+            if self.on_elected:
+                self.on_elected()
+        elif not leader and self.is_leader:
+            self.is_leader = False
+            print(f"⏸ Scheduler lease lost by {self.holder}")
+            if self.on_demoted:
+                self.on_demoted()
+
+    def _run(self):
+        while not self._stop.wait(self.heartbeat):
+            self._tick()
+
+    def start(self):
+        # First attempt runs inline so the startup winner schedules jobs before create_app() returns
+        self._tick()
+        self._thread = threading.Thread(target=self._run, name='scheduler-lease', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        if self.is_leader:
+            self.is_leader = False
+            try:
+                self.release()
+            except Exception as e:
+                print(f"⚠️ Could not release scheduler lease: {e}")
+
+
+# ===============================
+# App wiring
+# ===============================
+def init_app(app, scheduler):
+    """
+    Starts `scheduler` according to SCHEDULER_MODE. Jobs must be added
+    before this is called. Safe to call again from later create_app() calls.
+    """
+    global _mode, _election
+    app.config.setdefault('SCHEDULER_MODE', os.getenv('SCHEDULER_MODE', 'lease').lower())
+    app.config.setdefault('SCHEDULER_LEASE_TTL', int(os.getenv('SCHEDULER_LEASE_TTL', 90)))
+    app.config.setdefault('SCHEDULER_HEARTBEAT', int(os.getenv('SCHEDULER_HEARTBEAT', 30)))
+
+    mode = app.config['SCHEDULER_MODE']
+    if mode not in MODES:
+        raise ValueError(f"SCHEDULER_MODE must be one of {', '.join(MODES)}, got {mode!r}")
+    if _mode is not None:
+        # Already decided for this process
+        return
+    _mode = mode
+
+    if mode == 'off':
+        print("⏸ Scheduler disabled in this process (SCHEDULER_MODE=off).")
+        return
+
+    def start_or_resume():
+        if scheduler.running:
+            scheduler.resume()
+            print("▶️ Scheduler resumed.")
+        else:
+            scheduler.start()
+            print("🚀 Scheduler started successfully.")
+
+    if mode == 'always':
+        start_or_resume()
+        return
+
+    _election = LeaderElection(
+        app,
+        ttl=app.config['SCHEDULER_LEASE_TTL'],
+        heartbeat=app.config['SCHEDULER_HEARTBEAT'],
+        on_elected=start_or_resume,
+        on_demoted=scheduler.pause
+    )
+    _election.start()
+    if not _election.is_leader:
+        print("⏳ Another process holds the scheduler lease; standing by.")
+
+
+def owns_scheduled_jobs():
+    """True if scheduled jobs should run in this process right now."""
+    if _mode == 'always':
+        return True
+    return _election is not None and _election.is_leader
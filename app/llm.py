@@ -0,0 +1,184 @@
+"""
+Process-wide Groq client for the chatbot's AI fallback.
+
+The client is built once per process, on the first AI call, and reused by
+every request, so completions ride a pooled keep-alive connection instead
+of a fresh TLS handshake each time. Calls are bounded three ways:
+
+- LLM_TIMEOUT:         per-request HTTP timeout (seconds)
+- LLM_MAX_CONCURRENCY: in-flight completions per process; callers wait at
+                       most LLM_QUEUE_TIMEOUT seconds for a slot
+- circuit breaker:     after LLM_BREAKER_THRESHOLD consecutive failures,
+                       calls fail fast for LLM_BREAKER_RESET seconds
+
+Any of these raises LLMUnavailable so the route can answer right away.
+"""
+import os
+import time
+import threading
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+
+class LLMUnavailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            # Half-open: let a single trial call through once the cool-down passes
+            if time.monotonic() - self._opened_at >= self.reset_timeout and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class LLMClient:
+    def __init__(self, api_key, model=DEFAULT_MODEL, timeout=10.0, max_retries=0,
+                 max_concurrency=4, queue_timeout=2.0, breaker=None):
+        self.model = model
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._api_key = api_key
+        self._timeout = timeout
+        self._max_retries = max_retries
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return bool(self._api_key)
+
+    def _get_client(self):
+        # groq (and its pydantic models) load on the first AI call, not at app startup
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from groq import Groq
+                    self._client = Groq(api_key=self._api_key, timeout=self._timeout,
+                                        max_retries=self._max_retries)
+        return self._client
+
+    def _acquire(self):
+        if not self.configured:
+            raise LLMUnavailable("AI service is not configured.")
+        # Slot first: a half-open breaker hands out a single trial, which must
+        # only go to a caller that will actually make the call and report back
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise LLMUnavailable("AI service is busy.")
+        if not self.breaker.allow():
+            self._slots.release()
+            raise LLMUnavailable("AI service is temporarily unavailable.")
+
+    def chat(self, messages, temperature=0.7, max_tokens=300):
+        """
+        Returns the completion text for `messages`, or raises LLMUnavailable
+        when the service is unconfigured, saturated or tripped.
+        """
+        self._acquire()
+        try:
+            response = self._get_client().chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        finally:
+            self._slots.release()
+
+        self.breaker.record_success()
+        return response.choices[0].message.content
+
+    def stream_chat(self, messages, temperature=0.7, max_tokens=300):
+        """
+        Yields completion text fragments as the model generates them. The
+        concurrency slot is held until the stream finishes or is closed.
+        """
+        self._acquire()
+        try:
+            with self._get_client().chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            ) as stream:
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        yield delta
+        except GeneratorExit:
+            # Caller stopped reading (e.g. the browser went away); upstream was answering fine
+            self.breaker.record_success()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            self._slots.release()
+
+
+# ===============================
+# App wiring
+# ===============================
+_client = None
+
+
+def init_app(app):
+    global _client
+    api_key = os.getenv("GROQ_API_KEY", "")
+    if "YOUR_GROQ_API_KEY" in api_key:
+        api_key = ""
+
+    app.config.setdefault('LLM_MODEL', os.getenv('LLM_MODEL', DEFAULT_MODEL))
+    app.config.setdefault('LLM_TIMEOUT', float(os.getenv('LLM_TIMEOUT', 10)))
+    app.config.setdefault('LLM_MAX_RETRIES', int(os.getenv('LLM_MAX_RETRIES', 0)))
+    app.config.setdefault('LLM_MAX_CONCURRENCY', int(os.getenv('LLM_MAX_CONCURRENCY', 4)))
+    app.config.setdefault('LLM_QUEUE_TIMEOUT', float(os.getenv('LLM_QUEUE_TIMEOUT', 2)))
+    app.config.setdefault('LLM_BREAKER_THRESHOLD', int(os.getenv('LLM_BREAKER_THRESHOLD', 5)))
+    app.config.setdefault('LLM_BREAKER_RESET', float(os.getenv('LLM_BREAKER_RESET', 30)))
+
+    _client = LLMClient(
+        api_key,
+        model=app.config['LLM_MODEL'],
+        timeout=app.config['LLM_TIMEOUT'],
+        max_retries=app.config['LLM_MAX_RETRIES'],
+        max_concurrency=app.config['LLM_MAX_CONCURRENCY'],
+        queue_timeout=app.config['LLM_QUEUE_TIMEOUT'],
+        breaker=CircuitBreaker(app.config['LLM_BREAKER_THRESHOLD'], app.config['LLM_BREAKER_RESET'])
+    )
+    app.extensions['llm'] = _client
+
+
+def get_client():
+    return _client
@@ -0,0 +1,210 @@
+"""
+Outbound email dispatch.
+
+A Dispatcher pushes batches of messages through one transport with bounded
+concurrency. Transports are interchangeable:
+
+- sendgrid: SendGrid v3 API over a pooled, keep-alive HTTP session
+- smtp:     one reusable SMTP connection per worker thread
+- file:     appends JSON lines to a local file (offline runs and benchmarks)
+
+The transport is picked with MAIL_TRANSPORT (default "sendgrid").
+"""
+import os
+import json
+import smtplib
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+import requests
+from requests.adapters import HTTPAdapter
+
+EmailMessage = namedtuple('EmailMessage', ['to_email', 'subject', 'body'])
+
+DEFAULT_OUTBOX = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'outbox.jsonl')
+
+
+# ===============================
+# Transports
+# ===============================
+class SendGridTransport:
+    url = "https://api.sendgrid.com/v3/mail/send"
+
+    def __init__(self, api_key, sender, pool_size=10, timeout=10):
+        self.sender = sender
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+
+    def send(self, message):
+        data = {
+            "personalizations": [{
+                "to": [{"email": message.to_email}],
+                "subject": message.subject
+            }],
+            "from": {"email": self.sender},
+            "content": [{
+                "type": "text/plain",
+                "value": message.body
+            }]
+        }
+
+        try:
+            print("📤 Sending email to:", message.to_email)
+            response = self.session.post(self.url, json=data, timeout=self.timeout)
+            print("📨 SendGrid response code:", response.status_code)
+
+            if 200 <= response.status_code < 300:
+                print("✅ Email accepted by SendGrid")
+                return True
+
+            print("❌ Email rejected by SendGrid:", response.text)
+            return False
+
+        except Exception as e:
+            print("❌ SendGrid request failed:", e)
+            return False
+
+
+class SMTPTransport:
+    def __init__(self, host, port, username, password, sender, use_tls=True, timeout=10):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.sender = sender
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                conn.starttls()
+            if self.username:
+                conn.login(self.username, self.password)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.quit()
+            except Exception:
+                pass
+
+    def send(self, message):
+        msg = MIMEText(message.body)
+        msg['Subject'] = message.subject
+        msg['From'] = self.sender
+        msg['To'] = message.to_email
+
+        # One retry on a fresh connection if the pooled one went stale
+        for attempt in range(2):
+            try:
+                self._connection().send_message(msg)
+                return True
+            except smtplib.SMTPServerDisconnected:
+                self._drop_connection()
+            except Exception as e:
+                print("❌ SMTP send failed:", e)
+                self._drop_connection()
+                return False
+        return False
+
+
+class FileTransport:
+    def __init__(self, path=DEFAULT_OUTBOX):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def send(self, message):
+        line = json.dumps(message._asdict())
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+        return True
+
+
+def create_transport_from_env():
+    """
+    Builds the transport named by MAIL_TRANSPORT, or returns None if its
+    configuration is incomplete.
+    """
+    kind = os.environ.get("MAIL_TRANSPORT", "sendgrid").lower()
+    sender = os.environ.get("MAIL_DEFAULT_SENDER")
+
+    if kind == 'file':
+        return FileTransport(os.environ.get("MAIL_OUTBOX_PATH", DEFAULT_OUTBOX))
+
+    if not sender:
+        print("❌ ERROR: MAIL_DEFAULT_SENDER not set.")
+        return None
+
+    if kind == 'smtp':
+        host = os.environ.get("MAIL_SERVER")
+        if not host:
+            print("❌ ERROR: MAIL_SERVER not set.")
+            return None
+        return SMTPTransport(
+            host,
+            int(os.environ.get("MAIL_PORT", 587)),
+            os.environ.get("MAIL_USERNAME"),
+            os.environ.get("MAIL_PASSWORD"),
+            sender,
+            use_tls=os.environ.get("MAIL_USE_TLS", "true").lower() != "false"
+        )
+
+    api_key = os.environ.get("SENDGRID_API_KEY")
+    if not api_key:
+        print("❌ ERROR: SENDGRID_API_KEY not found.")
+        return None
+    return SendGridTransport(api_key, sender, pool_size=int(os.environ.get("MAIL_MAX_WORKERS", 4)))
+
+
+# ===============================
+# Dispatcher
+# ===============================
+class Dispatcher:
+    def __init__(self, transport, max_workers=4):
+        self.transport = transport
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mail')
+
+    def send(self, message):
+        if self.transport is None:
+            return False
+        return self.transport.send(message)
+
+    def send_batch(self, messages):
+        """
+        Sends all messages concurrently and returns a list of booleans in
+        the same order.
+        """
+        if self.transport is None:
+            return [False] * len(messages)
+        return list(self._executor.map(self.transport.send, messages))
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None or _dispatcher.transport is None:
+            _dispatcher = Dispatcher(
+                create_transport_from_env(),
+                max_workers=int(os.environ.get("MAIL_MAX_WORKERS", 4))
+            )
+        return _dispatcher
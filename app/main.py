@@ -1,46 +1,68 @@
-from flask import Blueprint, render_template, redirect, url_for, request, jsonify, session
+from flask import Blueprint, render_template, redirect, url_for, request, jsonify, session, Response, stream_with_context
 from flask_login import login_required, current_user
-import os
 import re
-from groq import Groq
-from .models import Event, Notification, InterviewQuestion
+import json
+import uuid
+from .models import Notification
+from .search import search_questions
+from .llm import get_client as get_llm_client, LLMUnavailable
+from . import answer_cache
+from . import chat_store
 from . import db
 
 main = Blueprint('main', __name__)
 
-@main.route('/chatbot/ask', methods=['POST'])
-@login_required
-def ask_assistant():
-    data = request.json
-    user_query = data.get('message', '').strip().lower()
-    
-    if not user_query:
-        return jsonify({"answer": "I didn't quite catch that. Could you please rephrase?"})
+@main.app_context_processor
+def inject_notifications():
+    # Exposed as callables so pages only query when the header renders them
+    from . import notifications
+    return {
+        'unread_notification_count': notifications.unread_count,
+        'recent_notifications': notifications.recent,
+        'unread_welcome_notification': notifications.unread_welcome
+    }
 
-    # 🔹 Manage Chat History in Session
-    if 'chat_history' not in session:
-        session['chat_history'] = []
-    
+# ===============================
+# Chatbot
+# ===============================
+SYSTEM_PROMPT = "You are StudentHub Assistant. Be concise and professional. You remember the conversation history."
+AI_PREFIX = "[AI Assistant] "
+
+
+def _chat_id():
+    # History used to ride in the cookie; drop it so the cookie stays small
+    session.pop('chat_history', None)
+    if 'chat_id' not in session:
+        session['chat_id'] = uuid.uuid4().hex
+    return session['chat_id']
+
+
+def _answer_locally(user_query, chat_id):
+    """
+    Tries the question bank, then the answer cache. Returns (answer, None)
+    on a hit, or (None, fallback) where fallback holds what the LLM call
+    needs: the prompt messages and the answer-cache key.
+    """
     # 🔹 Identify if it's likely a follow-up question
     context_words = {'for', 'about', 'how', 'what', 'it', 'they', 'them', 'then', 'his', 'her', 'its', 'who'}
     query_words_set = set(user_query.split())
-    has_history = len(session['chat_history']) > 0
+    has_history = chat_store.has_history(chat_id)
     is_follow_up = has_history and (query_words_set.intersection(context_words) or len(query_words_set) <= 3)
 
-    from .models import InterviewQuestion
     # 🔹 DB Match Search with Scoring
     greetings = {'hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening', 'namaste', 'morning'}
     
     best_match = None
     max_score = 0
+    query_words = []
 
     # Skip DB match if it's a greeting or a likely follow-up
     if user_query not in greetings and not is_follow_up:
         stopwords = {'what', 'is', 'the', 'of', 'in', 'and', 'for', 'a', 'to', 'how', 'an', 'are', 'tell', 'me', 'about', 'difference', 'between'}
         query_words = [w for w in user_query.split() if w not in stopwords and len(w) > 2]
         
-        all_questions = InterviewQuestion.query.all()
-        for q in all_questions:
+        candidates = search_questions(query_words or user_query.split())
+        for q in candidates:
             q_text = q.question.lower()
             score = 0
             
@@ -58,54 +80,128 @@ def ask_assistant():
                 best_match = q
 
     # If multiple words were searched, require a higher score (at least 20) to prevent single-word false matches
-    threshold = 20 if "query_words" in locals() and len(query_words) > 1 else 10
+    threshold = 20 if len(query_words) > 1 else 10
 
     if best_match and max_score >= threshold:
-        answer = f"[{best_match.category.upper()}] {best_match.answer}"
+        return f"[{best_match.category.upper()}] {best_match.answer}", None
+
+    # 🔹 Conversation history is only needed from here on
+    history = chat_store.history(chat_id) if has_history else []
+
+    # 🔹 Cached AI answers for repeated questions
+    cache_key, normalized_query = answer_cache.cache_key(
+        user_query, history if is_follow_up else None
+    )
+    cached_answer = answer_cache.get(cache_key) if normalized_query else None
+    if cached_answer:
+        return AI_PREFIX + cached_answer, None
+
+    # Build messages with history
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    for hist in history:
+        messages.append(hist)
+    messages.append({"role": "user", "content": user_query})
+
+    return None, {"messages": messages, "cache_key": cache_key, "normalized_query": normalized_query}
+
+
+@main.route('/chatbot/ask', methods=['POST'])
+@login_required
+def ask_assistant():
+    data = request.json
+    user_query = data.get('message', '').strip().lower()
+    
+    if not user_query:
+        return jsonify({"answer": "I didn't quite catch that. Could you please rephrase?"})
+
+    # 🔹 Chat History lives server-side, keyed by the session's chat id
+    chat_id = _chat_id()
+
+    answer, fallback = _answer_locally(user_query, chat_id)
+    if answer:
         # Store in history for context
-        session['chat_history'].append({"role": "user", "content": user_query})
-        session['chat_history'].append({"role": "assistant", "content": answer})
-        session['chat_history'] = session['chat_history'][-10:] # Keep last 10
-        session.modified = True
+        chat_store.append_exchange(chat_id, user_query, answer)
         return jsonify({"answer": answer})
 
     # 🔥 GROQ AI FALLBACK
-    try:
-        from dotenv import load_dotenv
-        load_dotenv(override=True)
-        
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key or "YOUR_GROQ_API_KEY" in api_key:
-            return jsonify({"answer": "AI service is initializing. Please try again in 1 minute."})
+    client = get_llm_client()
+    if client is None or not client.configured:
+        return jsonify({"answer": "AI service is initializing. Please try again in 1 minute."})
 
-        client = Groq(api_key=api_key)
-        
-        # Build messages with history
-        messages = [{"role": "system", "content": "You are StudentHub Assistant. Be concise and professional. You remember the conversation history."}]
-        for hist in session['chat_history']:
-            messages.append(hist)
-        messages.append({"role": "user", "content": user_query})
-
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=300
-        )
-        
-        ai_answer = response.choices[0].message.content
+    try:
+        ai_answer = client.chat(fallback["messages"], temperature=0.7, max_tokens=300)
+        if fallback["normalized_query"]:
+            answer_cache.put(fallback["cache_key"], fallback["normalized_query"], ai_answer)
         
-        # Update Session History
-        session['chat_history'].append({"role": "user", "content": user_query})
-        session['chat_history'].append({"role": "assistant", "content": ai_answer})
-        session['chat_history'] = session['chat_history'][-10:] # Keep last 10
-        session.modified = True
+        # Update Chat History
+        chat_store.append_exchange(chat_id, user_query, ai_answer)
         
-        return jsonify({"answer": f"[AI Assistant] {ai_answer}"})
+        return jsonify({"answer": AI_PREFIX + ai_answer})
+    except LLMUnavailable as e:
+        print(f"GROQ UNAVAILABLE: {e}")
+        return jsonify({"answer": "The AI assistant is busy right now. Please try again in a moment."})
     except Exception as e:
         print(f"GROQ ERROR: {e}")
         return jsonify({"answer": f"I'm currently unable to process advanced queries. Error: {str(e)}"})
 
+@main.route('/chatbot/ask/stream', methods=['POST'])
+@login_required
+def ask_assistant_stream():
+    """
+    Server-sent events variant of /chatbot/ask: "token" events carry text
+    as the model generates it, then one "done" event has the full answer.
+    Question-bank and cached answers arrive as a single "done" event.
+    """
+    data = request.json
+    user_query = data.get('message', '').strip().lower()
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    def respond(generator):
+        return Response(stream_with_context(generator), mimetype='text/event-stream',
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    def single(answer):
+        return respond(iter([sse("done", {"answer": answer})]))
+
+    if not user_query:
+        return single("I didn't quite catch that. Could you please rephrase?")
+
+    chat_id = _chat_id()
+
+    answer, fallback = _answer_locally(user_query, chat_id)
+    if answer:
+        chat_store.append_exchange(chat_id, user_query, answer)
+        return single(answer)
+
+    client = get_llm_client()
+    if client is None or not client.configured:
+        return single("AI service is initializing. Please try again in 1 minute.")
+
+    def generate():
+        parts = []
+        try:
+            for i, fragment in enumerate(client.stream_chat(fallback["messages"], temperature=0.7, max_tokens=300)):
+                parts.append(fragment)
+                yield sse("token", {"text": AI_PREFIX + fragment if i == 0 else fragment})
+        except LLMUnavailable as e:
+            print(f"GROQ UNAVAILABLE: {e}")
+            yield sse("done", {"answer": "The AI assistant is busy right now. Please try again in a moment."})
+            return
+        except Exception as e:
+            print(f"GROQ ERROR: {e}")
+            yield sse("done", {"answer": f"I'm currently unable to process advanced queries. Error: {str(e)}"})
+            return
+
+        ai_answer = "".join(parts)
+        if fallback["normalized_query"]:
+            answer_cache.put(fallback["cache_key"], fallback["normalized_query"], ai_answer)
+        chat_store.append_exchange(chat_id, user_query, ai_answer)
+        yield sse("done", {"answer": AI_PREFIX + ai_answer})
+
+    return respond(generate())
+
 @main.route('/')
 def index():
     return render_template('index.html')
@@ -114,22 +210,19 @@ def index():
 @login_required
 def dashboard():
     from .models import Resume
-    from datetime import datetime, timedelta
+    from .events import active_events, active_count, upcoming_count
+    from datetime import datetime
     
-    events = Event.query.filter_by(user_id=current_user.id).order_by(Event.date).all()
+    now_utc = datetime.utcnow()
     resume_count = Resume.query.filter_by(user_id=current_user.id).count()
     
-    # Calculate upcoming deadlines (events in next 7 days)
-    now = datetime.now()
-    seven_days_later = now + timedelta(days=7)
-    upcoming_deadlines = sum(1 for event in events 
-                            if not event.is_expired and event.date <= seven_days_later)
-    
     return render_template('dashboard/index.html', 
                           name=current_user.username, 
-                          events=events,
+                          events=active_events(current_user.id, now_utc, limit=5),
+                          active_count=active_count(current_user.id, now_utc),
                           resume_count=resume_count,
-                          upcoming_deadlines=upcoming_deadlines)
+                          # Events falling due in the next 7 days
+                          upcoming_deadlines=upcoming_count(current_user.id, now_utc))
 
 @main.route('/notifications/read/<int:notification_id>')
 @login_required
@@ -34,10 +34,32 @@ class Resume(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+# ===============================
+# RESUME BLOB MODEL
+# ===============================
+class ResumeBlob(db.Model):
+    # Uploaded file contents stored once per sha256; see blob_store.py
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)
+    ext = db.Column(db.String(10))
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 # ===============================
 # EVENT MODEL
 # ===============================
+EVENT_TIMEZONE = pytz.timezone("Asia/Kolkata")
+
+
 class Event(db.Model):
+    __table_args__ = (
+        # Serves the reminder job's "email_sent = 0 AND due_at <= now" range scan
+        db.Index('ix_event_email_sent_due_at', 'email_sent', 'due_at'),
+        # Serves the per-user active/upcoming counts and listings
+        db.Index('ix_event_user_due_at', 'user_id', 'due_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
@@ -54,18 +76,14 @@ class Event(db.Model):
 
     email_sent = db.Column(db.Boolean, default=False)
 
-    # -------------------------------
-    # Expiry Logic (Fixed & Reliable)
-    # -------------------------------
-    @property
-    def is_expired(self):
+    # Naive UTC moment the event falls due; derived from date + time (IST)
+    due_at = db.Column(db.DateTime, nullable=True)
+
+    def compute_due_at(self):
         """
-        Returns True if event datetime is in the past (Asia/Kolkata timezone)
+        Returns the event datetime (Asia/Kolkata) converted to naive UTC,
+        or None if date/time cannot be parsed.
         """
-
-        ist = pytz.timezone("Asia/Kolkata")
-        now = datetime.now(ist)
-
         try:
             # If time exists, combine date + time
             if self.time:
@@ -86,19 +104,44 @@ class Event(db.Model):
                 )
 
             # Localize to IST (important!)
-            event_dt = ist.localize(event_dt)
+            event_dt = EVENT_TIMEZONE.localize(event_dt)
 
-            return now >= event_dt
+            return event_dt.astimezone(pytz.utc).replace(tzinfo=None)
 
         except Exception as e:
-            print("Error in is_expired:", e)
+            print("Error computing due_at:", e)
+            return None
+
+    # -------------------------------
+    # Expiry Logic (Fixed & Reliable)
+    # -------------------------------
+    @property
+    def is_expired(self):
+        """
+        Returns True if event datetime is in the past (Asia/Kolkata timezone)
+        """
+        due_at = self.due_at or self.compute_due_at()
+        if due_at is None:
             return False
 
+        return datetime.utcnow() >= due_at
+
+
+@db.event.listens_for(Event, 'before_insert')
+@db.event.listens_for(Event, 'before_update')
+def _sync_event_due_at(mapper, connection, target):
+    target.due_at = target.compute_due_at()
+
 
 # ===============================
 # NOTIFICATION MODEL
 # ===============================
 class Notification(db.Model):
+    __table_args__ = (
+        # Serves the header's unread count and most-recent list per user
+        db.Index('ix_notification_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     message = db.Column(db.String(500), nullable=False)
@@ -114,7 +157,61 @@ class Notification(db.Model):
 # ===============================
 class InterviewQuestion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    category = db.Column(db.String(50), nullable=False)
+    category = db.Column(db.String(50), nullable=False, index=True)
     question = db.Column(db.Text, nullable=False)
     answer = db.Column(db.Text, nullable=False)
-    difficulty = db.Column(db.String(20), default='Medium')
\ No newline at end of file
+    difficulty = db.Column(db.String(20), default='Medium')
+
+# ===============================
+# CHATBOT ANSWER CACHE MODEL
+# ===============================
+class ChatResponseCache(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # sha256 of the normalized query (+ follow-up context)
+    key = db.Column(db.String(64), unique=True, nullable=False)
+    normalized_query = db.Column(db.Text, nullable=False)
+    answer = db.Column(db.Text, nullable=False)
+    hits = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+# ===============================
+# CHAT MESSAGE MODEL
+# ===============================
+class ChatMessage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # Conversation id kept in the session cookie
+    chat_id = db.Column(db.String(32), nullable=False, index=True)
+    role = db.Column(db.String(20), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+# ===============================
+# BACKGROUND JOB MODEL
+# ===============================
+class Job(db.Model):
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    kind = db.Column(db.String(50), nullable=False)
+    # queued -> done | failed ("running" is reported from started_at or the pool)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Written by the submitting process while the job is unfinished
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+
+# ===============================
+# SCHEDULER LEASE MODEL
+# ===============================
+class SchedulerLease(db.Model):
+    # One row per leased role (e.g. "scheduler")
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100))
+    expires_at = db.Column(db.DateTime, nullable=False)
+    heartbeat_at = db.Column(db.DateTime)
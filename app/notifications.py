@@ -0,0 +1,56 @@
+"""
+Cheap notification lookups for the page header.
+
+unread_count() is cached per user and dropped whenever this process
+inserts, updates or deletes one of that user's notifications. Writes from
+other processes (e.g. the scheduler in another worker) show up once the
+short TTL expires.
+"""
+import time
+import threading
+from . import db
+from .models import Notification
+
+UNREAD_CACHE_TTL = 30  # seconds
+
+_unread_counts = {}  # user_id -> (count, expires_at)
+_lock = threading.Lock()
+
+
+def unread_count(user_id):
+    now = time.monotonic()
+    with _lock:
+        cached = _unread_counts.get(user_id)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    count = Notification.query.filter_by(user_id=user_id, is_read=False).count()
+    with _lock:
+        _unread_counts[user_id] = (count, now + UNREAD_CACHE_TTL)
+    return count
+
+
+def recent(user_id, limit=5):
+    return (
+        Notification.query
+        .filter_by(user_id=user_id)
+        .order_by(Notification.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def unread_welcome(user_id):
+    return Notification.query.filter_by(user_id=user_id, type='welcome', is_read=False).first()
+
+
+def invalidate(user_id):
+    with _lock:
+        _unread_counts.pop(user_id, None)
+
+
+@db.event.listens_for(Notification, 'after_insert')
+@db.event.listens_for(Notification, 'after_update')
+@db.event.listens_for(Notification, 'after_delete')
+def _invalidate_on_write(mapper, connection, target):
+    invalidate(target.user_id)
@@ -0,0 +1,343 @@
+"""
+Resume PDF rendering with an on-disk cache.
+
+Builder resumes store a flat dict of editor fields; values are plain text
+or small HTML fragments (div/ul/li/strong/span) from the contenteditable
+layouts. render_resume_pdf() lays out every field with ReportLab platypus:
+a header from the name, title and contact fields, then one section per
+field group (exp1_*, edu2_*, skills_* ...) in editor order.
+
+This is an approximation of the HTML layouts, not a pixel copy: fonts and
+accent colours follow TEMPLATE_STYLES, and the multi-column layouts in
+TEMPLATE_LAYOUTS put the same sections in a left column on the first page
+as their HTML does. Backgrounds, icons and exact spacing are not
+reproduced.
+
+PDFs are cached as instance/pdf_cache/<resume_id>_<template_id>_<hash>.pdf
+where hash covers the content, so an edited resume never serves a stale
+file; invalidate() reclaims the old files when the editor saves.
+
+ReportLab is imported inside the render functions: rendering only happens
+in job workers, so web processes never pay for loading it.
+"""
+import os
+import re
+import io
+import json
+import glob
+import hashlib
+from html import unescape
+from html.parser import HTMLParser
+from xml.sax.saxutils import escape
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'pdf_cache')
+# Part of the cache key; bump it when the rendered layout changes
+LAYOUT_VERSION = 2
+
+# Fonts and colours approximating each HTML layout
+TEMPLATE_STYLES = {
+    'harshibar': {'font': 'Times-Roman', 'bold': 'Times-Bold', 'italic': 'Times-Italic', 'accent': '#000000', 'muted': '#666666'},
+    'academic_pro': {'font': 'Times-Roman', 'bold': 'Times-Bold', 'italic': 'Times-Italic', 'accent': '#000000', 'muted': '#444444'},
+    'javid_pro': {'font': 'Helvetica', 'bold': 'Helvetica-Bold', 'italic': 'Helvetica-Oblique', 'accent': '#333333', 'muted': '#999999'},
+    'pratik_dutta': {'font': 'Helvetica', 'bold': 'Helvetica-Bold', 'italic': 'Helvetica-Oblique', 'accent': '#5b9bd5', 'muted': '#666666'},
+}
+DEFAULT_STYLE = {'font': 'Helvetica', 'bold': 'Helvetica-Bold', 'italic': 'Helvetica-Oblique', 'accent': '#1a1a1a', 'muted': '#666666'}
+
+# Column layouts of the multi-column templates, by section name (see
+# _section_for). "top" sections run full width under the header, "left"
+# sections fill a left column of left_width of the page, and every other
+# section goes in the right column. header='left' puts the header in the
+# left column. Templates not listed flow in a single column.
+TEMPLATE_LAYOUTS = {
+    'arpit': {'left': ('summary', 'education', 'skills'), 'left_width': 0.32},
+    'creative': {'left': ('skills',), 'left_width': 0.3, 'header': 'left'},
+    'javid_pro': {'left': ('objective', 'education', 'coursework', 'skills'), 'left_width': 0.32},
+    'john_snow': {'top': ('skills',), 'left': ('education', 'awards', 'languages'), 'left_width': 0.5},
+    'nikhil': {'top': ('summary', 'experience'), 'left': ('skills', 'education'), 'left_width': 0.5},
+}
+# Fields shown under the name rather than as sections
+HEADER_FIELDS = ('title',)
+TEMPLATE_HEADER_FIELDS = {
+    'pratik_dutta': ('title', 'department', 'university'),
+}
+
+CONTACT_FIELDS = ('phone', 'email', 'address', 'location', 'website', 'portfolio',
+                  'linkedin', 'github', 'youtube', 'twitter', 'facebook')
+# Field-name prefixes that belong to the same resume section
+SECTION_ALIASES = {
+    'exp': 'experience', 'edu': 'education', 'degree': 'education', 'university': 'education',
+    'proj': 'projects', 'course': 'coursework', 'skill': 'skills', 'summary': 'summary',
+}
+SKIPPED_FIELDS = ('name', 'uploaded_file', 'blob_sha', 'file_type')
+
+# Field suffixes that name a layout variant rather than a sub-heading
+UNLABELLED_SUFFIXES = ('extra', 'sidebar', 'list', 'compact')
+
+ENUMERATED_RE = re.compile(r'^([a-z]+)\d+$')
+
+
+# ===============================
+# HTML fragment -> flowable text
+# ===============================
+class _FragmentParser(HTMLParser):
+    """
+    Splits an editor HTML fragment into (kind, markup) blocks, where kind
+    is 'para' or 'bullet' and markup uses ReportLab's inline tags.
+    """
+    BLOCK_TAGS = {'div', 'p', 'ul', 'ol', 'li', 'tr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+    INLINE_TAGS = {'strong': 'b', 'b': 'b', 'em': 'i', 'i': 'i', 'u': 'u'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self._parts = []
+        self._kind = 'para'
+        self._open_inline = []
+
+    def _flush(self):
+        # Close any inline tags still open so each block is well-formed
+        markup = "".join(self._parts) + "".join(f"</{t}>" for t in reversed(self._open_inline))
+        text = re.sub(r'<[^>]+>', '', markup).strip()
+        if text:
+            self.blocks.append((self._kind, re.sub(r'\s+', ' ', markup).strip()))
+        self._parts = [f"<{t}>" for t in self._open_inline]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.BLOCK_TAGS:
+            self._flush()
+            self._kind = 'bullet' if tag == 'li' else 'para'
+        elif tag == 'br':
+            self._parts.append('<br/>')
+        elif tag == 'span' and "".join(self._parts).strip():
+            # entry-header spans hold the right-aligned date/location
+            self._parts.append(' &nbsp;|&nbsp; ')
+        elif tag in self.INLINE_TAGS:
+            self._open_inline.append(self.INLINE_TAGS[tag])
+            self._parts.append(f"<{self.INLINE_TAGS[tag]}>")
+
+    def handle_endtag(self, tag):
+        if tag in self.BLOCK_TAGS:
+            self._flush()
+            self._kind = 'para'
+        elif tag in self.INLINE_TAGS and self.INLINE_TAGS[tag] in self._open_inline:
+            mapped = self.INLINE_TAGS[tag]
+            self._open_inline.remove(mapped)
+            self._parts.append(f"</{mapped}>")
+
+    def handle_data(self, data):
+        self._parts.append(escape(data))
+
+    def close(self):
+        super().close()
+        self._open_inline = []
+        self._flush()
+        return self.blocks
+
+
+def fragment_blocks(value):
+    if '<' not in value:
+        return [('para', escape(unescape(value)).replace('\n', '<br/>'))] if value.strip() else []
+    parser = _FragmentParser()
+    parser.feed(value)
+    return parser.close()
+
+
+# ===============================
+# Layout
+# ===============================
+def _section_for(key):
+    head = key.split('_', 1)[0]
+    match = ENUMERATED_RE.match(head)
+    if match:
+        head = match.group(1)
+    return SECTION_ALIASES.get(head, head)
+
+
+def _label_for(key):
+    parts = key.split('_', 1)
+    if len(parts) == 1 or ENUMERATED_RE.match(parts[0]) or parts[1] in UNLABELLED_SUFFIXES:
+        return None
+    return parts[1].replace('_', ' ').title()
+
+
+def group_sections(content, header_fields=HEADER_FIELDS):
+    """Returns [(section, [(label, value), ...])] in editor field order."""
+    sections = {}
+    for key, value in content.items():
+        if key in SKIPPED_FIELDS or key in CONTACT_FIELDS or key in header_fields:
+            continue
+        if not isinstance(value, str) or not value.strip():
+            continue
+        sections.setdefault(_section_for(key), []).append((_label_for(key), value))
+    return list(sections.items())
+
+
+def _styles(template_id):
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.colors import HexColor
+
+    spec = TEMPLATE_STYLES.get(template_id, DEFAULT_STYLE)
+    accent, muted = HexColor(spec['accent']), HexColor(spec['muted'])
+    return {
+        'spec': spec,
+        'accent': accent,
+        'name': ParagraphStyle('name', fontName=spec['bold'], fontSize=22, leading=26, alignment=1, textColor=accent),
+        'title': ParagraphStyle('title', fontName=spec['font'], fontSize=12, leading=15, alignment=1, textColor=muted),
+        'contact': ParagraphStyle('contact', fontName=spec['font'], fontSize=9.5, leading=12, alignment=1, textColor=muted),
+        'heading': ParagraphStyle('heading', fontName=spec['bold'], fontSize=12, leading=15, spaceBefore=10, textColor=accent),
+        'body': ParagraphStyle('body', fontName=spec['font'], fontSize=10, leading=13, spaceAfter=2),
+        'bullet': ParagraphStyle('bullet', fontName=spec['font'], fontSize=10, leading=13, leftIndent=14, bulletIndent=4),
+    }
+
+
+def _plain(value):
+    # Header fields are single lines; drop any markup the editor left in them
+    return escape(unescape(re.sub(r'<[^>]+>', ' ', value))).strip()
+
+
+def _header_flowables(content, header_fields, styles):
+    from reportlab.platypus import Paragraph, Spacer
+
+    story = []
+    if content.get('name'):
+        story.append(Paragraph(_plain(content['name']), styles['name']))
+    for field in header_fields:
+        if isinstance(content.get(field), str) and content[field].strip():
+            story.append(Paragraph(_plain(content[field]), styles['title']))
+    contacts = [_plain(content[f]) for f in CONTACT_FIELDS if isinstance(content.get(f), str) and content[f].strip()]
+    if contacts:
+        story.append(Paragraph(" &nbsp;|&nbsp; ".join(contacts), styles['contact']))
+    story.append(Spacer(1, 6))
+    return story
+
+
+def _section_flowables(sections, styles):
+    from reportlab.platypus import Paragraph, HRFlowable
+
+    spec = styles['spec']
+    story = []
+    for section, fields in sections:
+        story.append(Paragraph(escape(section.replace('_', ' ').upper()), styles['heading']))
+        story.append(HRFlowable(width='100%', thickness=0.7, color=styles['accent'], spaceAfter=4))
+        for label, value in fields:
+            blocks = fragment_blocks(value)
+            if label and len(blocks) == 1 and blocks[0][0] == 'para':
+                blocks = [('para', f'<font name="{spec["bold"]}">{escape(label)}:</font> {blocks[0][1]}')]
+            for kind, markup in blocks:
+                if kind == 'bullet':
+                    story.append(Paragraph(markup, styles['bullet'], bulletText='•'))
+                else:
+                    story.append(Paragraph(markup, styles['body']))
+    return story
+
+
+def _column_story(layout, header, sections, styles, frame, page_height):
+    """
+    Splits the resume over a full-width top frame and two columns on the
+    first page. Returns (first page frames, story), or None when the top
+    block would leave too little room for the columns.
+    """
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Frame, FrameBreak, NextPageTemplate
+
+    x, y, width, height = frame
+    top_names, left_names = layout.get('top', ()), layout['left']
+    top = [] if layout.get('header') == 'left' else list(header)
+    top += _section_flowables([s for s in sections if s[0] in top_names], styles)
+    left = list(header) if layout.get('header') == 'left' else []
+    left += _section_flowables([s for s in sections if s[0] in left_names and s[0] not in top_names], styles)
+    right = _section_flowables([s for s in sections if s[0] not in top_names and s[0] not in left_names], styles)
+
+    top_height = 0
+    for flowable in top:
+        top_height += flowable.wrap(width, page_height)[1] + flowable.getSpaceBefore() + flowable.getSpaceAfter()
+    if top_height > height / 2:
+        return None
+
+    gap = 0.3 * inch
+    left_width = width * layout['left_width'] - gap / 2
+    column_height = height - top_height - (6 if top else 0)
+    frames = [
+        Frame(x, y, left_width, column_height, id='left', leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0),
+        Frame(x + left_width + gap, y, width - left_width - gap, column_height, id='right',
+              leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0),
+    ]
+    story = [NextPageTemplate('rest')]
+    if top:
+        # A little slack so rounding never pushes the last top line into a column
+        frames.insert(0, Frame(x, y + height - top_height - 6, width, top_height + 6, id='top',
+                               leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0))
+        story += top + [FrameBreak()]
+    story += left + [FrameBreak()] + right
+    return frames, story
+
+
+def render_resume_pdf(content, template_id):
+    """Returns the rendered PDF for a builder resume as bytes."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import BaseDocTemplate, PageTemplate, Frame
+
+    styles = _styles(template_id)
+    header_fields = TEMPLATE_HEADER_FIELDS.get(template_id, HEADER_FIELDS)
+    header = _header_flowables(content, header_fields, styles)
+    sections = group_sections(content, header_fields)
+
+    buffer = io.BytesIO()
+    page_width, page_height = letter
+    margin_x, margin_y = 0.7 * inch, 0.6 * inch
+    frame = (margin_x, margin_y, page_width - 2 * margin_x, page_height - 2 * margin_y)
+    doc = BaseDocTemplate(buffer, pagesize=letter, leftMargin=margin_x, rightMargin=margin_x,
+                          topMargin=margin_y, bottomMargin=margin_y)
+    full_page = PageTemplate(id='rest', frames=[Frame(*frame, id='body')])
+
+    layout = TEMPLATE_LAYOUTS.get(template_id)
+    columns = _column_story(layout, header, sections, styles, frame, page_height) if layout else None
+    if columns:
+        first_frames, story = columns
+        doc.addPageTemplates([PageTemplate(id='first', frames=first_frames), full_page])
+    else:
+        doc.addPageTemplates([full_page])
+        story = header + _section_flowables(sections, styles)
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+# ===============================
+# Cache
+# ===============================
+def content_digest(content, template_id):
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False) + '|' + template_id + '|' + str(LAYOUT_VERSION)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def cache_path(resume_id, content, template_id):
+    """Returns (path, digest) of the cached PDF for this resume content."""
+    digest = content_digest(content, template_id)
+    return os.path.join(CACHE_DIR, f"{resume_id}_{template_id}_{digest[:32]}.pdf"), digest
+
+
+def render_to_cache(resume_id, content, template_id):
+    """
+    Renders a builder resume into the cache unless it is already there.
+    Runs in the job pool; returns the cached file path.
+    """
+    path, _ = cache_path(resume_id, content, template_id)
+    if not os.path.exists(path):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        pdf = render_resume_pdf(content, template_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)
+    return path
+
+
+def invalidate(resume_id):
+    """Deletes every cached PDF for a resume."""
+    for path in glob.glob(os.path.join(CACHE_DIR, f"{resume_id}_*.pdf")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,27 +1,25 @@
-import json
 import re
-import io
+from html import escape
 import os
-from flask import Blueprint, render_template, request, Response, flash, redirect, url_for
+from flask import Blueprint, render_template, request, flash, redirect, url_for, send_file
 from flask_login import login_required, current_user
 from .models import Resume
+from .resume_parser import parse_resume, split_skills
+from .template_registry import registry as template_registry
+from .uploads import UploadTooLarge
+from . import blob_store
+from . import pdf_renderer
+from .jobs import submit as submit_job, redirect_to, JobFailed
 from . import db
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-import pypdf
-import docx
 
 resume = Blueprint('resume', __name__)
 
 def get_templates():
-    json_path = os.path.join(os.path.dirname(__file__), 'templates.json')
-    try:
-        with open(json_path, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    return template_registry.all()
 
 def extract_text_from_pdf(filepath):
+    import pypdf
+
     text = ""
     try:
         reader = pypdf.PdfReader(filepath)
@@ -32,6 +30,8 @@ def extract_text_from_pdf(filepath):
     return text
 
 def extract_text_from_docx(filepath):
+    import docx
+
     text = ""
     try:
         doc = docx.Document(filepath)
@@ -41,39 +41,54 @@ def extract_text_from_docx(filepath):
         print(f"Error extracting DOCX text: {e}")
     return text
 
+def extract_editable_content(filepath, file_ext):
+    """
+    Job worker: extracts and parses an uploaded resume into editor
+    content. Returns None when no text could be extracted.
+    """
+    text = ""
+    if file_ext == '.pdf':
+        text = extract_text_from_pdf(filepath)
+    elif file_ext in ['.doc', '.docx']:
+        text = extract_text_from_docx(filepath)
+
+    if not text:
+        return None
+    return parse_resume_content(text)
+
+def _lines_to_html(heading, lines):
+    items = "".join(f"<li>{escape(line)}</li>" for line in lines)
+    return f"<h5>{heading}</h5><ul>{items}</ul>" if items else f"<h5>{heading}</h5>"
+
 def parse_resume_content(text):
     """
-    Basic parsing to extract contact info and dump rest into summary.
-    Ideally this would use NLP or more complex regex.
+    Splits extracted resume text into editor fields using the shared
+    section parser. Falls back to dumping the text into summary/experience
+    when no section headings are recognised.
     """
+    parsed = parse_resume(text)
     content = {
-        "name": "Your Name",
+        "name": parsed['name'] or "Your Name",
         "title": "Professional Title",
-        "email": "",
-        "phone": "",
-        "summary": "",
-        "skills": "Skill 1, Skill 2, ...",
-        "experience": "<h5>Experience</h5><p>Extracted content below:</p>",
-        "education": "<h5>Education</h5>"
+        "email": parsed['email'],
+        "phone": parsed['phone'],
+        "summary": " ".join(parsed['summary']),
+        "skills": ", ".join(split_skills(parsed['skills'])) or "Skill 1, Skill 2, ...",
+        "experience": _lines_to_html("Experience", parsed['experience']),
+        "education": _lines_to_html("Education", parsed['education']),
+        "projects": _lines_to_html("Projects", parsed['projects'])
     }
-    
-    # Try to find email
-    email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', text)
-    if email_match:
-        content['email'] = email_match.group(0)
-        
-    # Try to find phone (simple regex)
-    phone_match = re.search(r'(\+\d{1,3}[- ]?)?\(?\d{3}\)?[- ]?\d{3}[- ]?\d{4}', text)
-    if phone_match:
-        content['phone'] = phone_match.group(0)
+    if parsed['other']:
+        content['additional'] = _lines_to_html("Additional", parsed['other'])
+
+    if not (parsed['experience'] or parsed['education'] or parsed['skills'] or parsed['projects']):
+        # Dump the rest into summary for now, assuming user will edit it
+        # Cleaning up text slightly
+        clean_text = re.sub(r'\n+', '\n', text).strip()
+        content['summary'] = clean_text[:500] + "..." if len(clean_text) > 500 else clean_text
         
-    # Dump the rest into summary for now, assuming user will edit it
-    # Cleaning up text slightly
-    clean_text = re.sub(r'\n+', '\n', text).strip()
-    content['summary'] = clean_text[:500] + "..." if len(clean_text) > 500 else clean_text
-    
-    # Also put full text in experience so they can copy-paste parts
-    content['experience'] += f"<pre>{clean_text}</pre>"
+        # Also put full text in experience so they can copy-paste parts
+        content['experience'] += f"<pre>{escape(clean_text)}</pre>"
     
     return content
 
@@ -123,29 +138,22 @@ def editor(template_id, resume_id=None):
                         flash('Invalid file type. Please upload PDF, DOC, or DOCX files.', 'error')
                         return redirect(request.url)
                         
-                    # Remove old file
+                    # Store new file (deduplicated by content)
+                    try:
+                        blob_sha = blob_store.store(file, file_ext)
+                    except UploadTooLarge as e:
+                        flash(str(e), 'error')
+                        return redirect(request.url)
+
+                    # Drop the old file's reference once the new one is stored
                     if 'uploaded_file' in resume_data.content:
-                        upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads', 'resumes')
-                        old_filepath = os.path.join(upload_folder, resume_data.content['uploaded_file'])
-                        if os.path.exists(old_filepath):
-                            try:
-                                os.remove(old_filepath)
-                            except:
-                                pass # Ignore errors deleting old file
-                            
-                    # Save new file
-                    upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads', 'resumes')
-                    os.makedirs(upload_folder, exist_ok=True)
-                    
-                    import time
-                    filename = f"{current_user.id}_{int(time.time())}_{file.filename}"
-                    filepath = os.path.join(upload_folder, filename)
-                    file.save(filepath)
+                        blob_store.release_resume_file(resume_data.content)
                     
                     # Update content
                     # We need to assign a new dict to trigger SQLAlchemy update for JSON field sometimes
                     new_content = dict(resume_data.content) if resume_data.content else {}
-                    new_content['uploaded_file'] = filename
+                    new_content['uploaded_file'] = file.filename
+                    new_content['blob_sha'] = blob_sha
                     new_content['file_type'] = file_ext
                     resume_data.content = new_content
             
@@ -178,6 +186,7 @@ def editor(template_id, resume_id=None):
             existing_resume.content = data
             existing_resume.template_id = template_id
             db.session.commit()
+            pdf_renderer.invalidate(existing_resume.id)
             flash('Resume updated successfully!', 'success')
         else:
             # Create new resume
@@ -194,8 +203,7 @@ def editor(template_id, resume_id=None):
         return redirect(url_for('resume.my_resumes'))
 
     # For GET, render the editor
-    templates = get_templates()
-    selected_template = next((t for t in templates if t['id'] == template_id), None)
+    selected_template = template_registry.get(template_id)
     
     if not selected_template:
         return "Template not found", 404
@@ -468,10 +476,8 @@ def editor(template_id, resume_id=None):
 def my_resumes():
     """Display all saved resumes for the current user"""
     resumes = Resume.query.filter_by(user_id=current_user.id).order_by(Resume.created_at.desc()).all()
-    templates = get_templates()
-    
-    # Create a dict for quick template lookup
-    template_dict = {t['id']: t['name'] for t in templates}
+    # Template id -> display name
+    template_dict = template_registry.names()
     
     return render_template('resume/my_resumes.html', resumes=resumes, template_dict=template_dict)
 
@@ -502,23 +508,18 @@ def upload_resume():
         flash('Invalid file type. Please upload PDF, DOC, or DOCX files only.', 'error')
         return redirect(url_for('resume.my_resumes'))
     
-    # Create uploads directory if it doesn't exist
-    upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads', 'resumes')
-    os.makedirs(upload_folder, exist_ok=True)
-    
-    # Generate unique filename
-    import time
-    filename = f"{current_user.id}_{int(time.time())}_{file.filename}"
-    filepath = os.path.join(upload_folder, filename)
-    
-    # Save file
-    file.save(filepath)
+    # Stream file into the content-addressed store, enforcing the size limit
+    try:
+        blob_sha = blob_store.store(file, file_ext)
+    except UploadTooLarge as e:
+        flash(str(e), 'error')
+        return redirect(url_for('resume.my_resumes'))
     
-    # Save to database with file path
+    # Save to database with blob reference
     new_resume = Resume(
         user_id=current_user.id,
         title=resume_title,
-        content={'uploaded_file': filename, 'file_type': file_ext},
+        content={'uploaded_file': file.filename, 'blob_sha': blob_sha, 'file_type': file_ext},
         template_id='uploaded'
     )
     db.session.add(new_resume)
@@ -537,13 +538,11 @@ def delete_resume(resume_id):
     
     # If it's an uploaded resume, delete the file too
     if resume_data.template_id == 'uploaded' and 'uploaded_file' in resume_data.content:
-        upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads', 'resumes')
-        filepath = os.path.join(upload_folder, resume_data.content['uploaded_file'])
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        blob_store.release_resume_file(resume_data.content)
     
     db.session.delete(resume_data)
     db.session.commit()
+    pdf_renderer.invalidate(resume_id)
     flash('Resume deleted successfully!', 'success')
     return redirect(url_for('resume.my_resumes'))
 
@@ -557,17 +556,17 @@ def view_file(resume_id):
     # Check if this is an uploaded resume
     if 'uploaded_file' in resume_data.content:
         # Serve the uploaded file
-        upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads', 'resumes')
-        filepath = os.path.join(upload_folder, resume_data.content['uploaded_file'])
+        filepath, etag = blob_store.resume_file(resume_data.content)
         
-        if os.path.exists(filepath):
-            from flask import send_file
+        if filepath and os.path.exists(filepath):
             # Use original filename for inline view, but with inline disposition
             safe_filename = "".join(c for c in resume_data.title if c.isalnum() or c in (' ', '-', '_')).strip()
             file_ext = resume_data.content.get('file_type', '.pdf')
             safe_filename = safe_filename.replace(' ', '_') + file_ext
             
-            return send_file(filepath, as_attachment=False, download_name=safe_filename)
+            # Blobs are immutable, so their hash is a stable ETag for conditional GETs
+            return send_file(filepath, as_attachment=False, download_name=safe_filename,
+                             etag=etag or True, conditional=True)
         else:
             return "File not found", 404
             
@@ -583,48 +582,35 @@ def download(resume_id):
     # Check if this is an uploaded resume
     if resume_data.template_id == 'uploaded' and 'uploaded_file' in resume_data.content:
         # Serve the uploaded file
-        upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads', 'resumes')
-        filepath = os.path.join(upload_folder, resume_data.content['uploaded_file'])
+        filepath, etag = blob_store.resume_file(resume_data.content)
         
-        if os.path.exists(filepath):
-            from flask import send_file
+        if filepath and os.path.exists(filepath):
             # Use original filename for download
             safe_filename = "".join(c for c in resume_data.title if c.isalnum() or c in (' ', '-', '_')).strip()
             file_ext = resume_data.content.get('file_type', '.pdf')
             safe_filename = safe_filename.replace(' ', '_') + file_ext
             
-            return send_file(filepath, as_attachment=True, download_name=safe_filename)
+            return send_file(filepath, as_attachment=True, download_name=safe_filename,
+                             etag=etag or True, conditional=True)
         else:
             flash('Resume file not found', 'error')
             return redirect(url_for('resume.my_resumes'))
     
-    # Generate PDF for created resumes using ReportLab
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    
-    # Simple PDF generation based on data
-    # In a real app, this would interpret the template layout
-    y = height - 50
-    p.drawString(100, y, f"Name: {resume_data.content.get('name', 'N/A')}")
-    y -= 20
-    p.drawString(100, y, f"Email: {resume_data.content.get('email', 'N/A')}")
-    y -= 20
-    p.drawString(100, y, "Summary:")
-    y -= 20
-    p.drawString(120, y, resume_data.content.get('summary', ''))
-    
-    p.showPage()
-    p.save()
-    
-    buffer.seek(0)
+    # Serve the cached render of created resumes, rendering in the job pool on a miss
+    filepath, digest = pdf_renderer.cache_path(resume_data.id, resume_data.content, resume_data.template_id)
+    if not os.path.exists(filepath):
+        rid = resume_data.id
+        job_id = submit_job('render_pdf', pdf_renderer.render_to_cache,
+                            rid, resume_data.content, resume_data.template_id,
+                            on_done=lambda job, path: redirect_to('resume.download', resume_id=rid))
+        return redirect(url_for('jobs.wait', job_id=job_id))
+
     # Use resume title as filename, sanitize it
     safe_filename = "".join(c for c in resume_data.title if c.isalnum() or c in (' ', '-', '_')).strip()
     safe_filename = safe_filename.replace(' ', '_') + '.pdf'
-    
 
-    return Response(buffer, mimetype='application/pdf', 
-                    headers={"Content-Disposition": f"attachment;filename={safe_filename}"})
+    return send_file(filepath, mimetype='application/pdf', as_attachment=True, download_name=safe_filename,
+                     etag=digest, conditional=True)
 
 @resume.route('/resume-builder/convert/<int:resume_id>', methods=['POST'])
 @login_required
@@ -639,40 +625,33 @@ def convert_to_editable(resume_id):
         return redirect(url_for('resume.editor', template_id=resume_data.template_id, resume_id=resume_id))
         
     # Get file path
-    upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads', 'resumes')
-    filepath = os.path.join(upload_folder, resume_data.content['uploaded_file'])
+    filepath, _ = blob_store.resume_file(resume_data.content)
     
-    if not os.path.exists(filepath):
+    if not filepath or not os.path.exists(filepath):
         flash('Original file not found.', 'error')
         return redirect(url_for('resume.my_resumes'))
         
-    # Extract text
-    text = ""
+    # Extraction and parsing run in the job pool; the new resume is
+    # created once the job finishes
     file_ext = resume_data.content.get('file_type', '').lower()
-    
-    if file_ext == '.pdf':
-        text = extract_text_from_pdf(filepath)
-    elif file_ext in ['.doc', '.docx']:
-        text = extract_text_from_docx(filepath)
-        
-    if not text:
-        flash('Could not extract text from file.', 'error')
-        return redirect(url_for('resume.my_resumes'))
-        
-    # Parse content
-    parsed_content = parse_resume_content(text)
-    
-    # Create new resume
+    user_id = current_user.id
     new_title = f"Editable Copy - {resume_data.title}"
-    new_resume = Resume(
-        user_id=current_user.id,
-        title=new_title,
-        content=parsed_content,
-        template_id='classic' # Default to classic template
-    )
-    
-    db.session.add(new_resume)
-    db.session.commit()
-    
-    flash('Resume converted successfully! You can now edit the content.', 'success')
-    return redirect(url_for('resume.editor', template_id='classic', resume_id=new_resume.id))
+
+    def create_editable_copy(job, parsed_content):
+        if parsed_content is None:
+            raise JobFailed('Could not extract text from file.')
+
+        # Create new resume
+        new_resume = Resume(
+            user_id=user_id,
+            title=new_title,
+            content=parsed_content,
+            template_id='classic' # Default to classic template
+        )
+        db.session.add(new_resume)
+        db.session.flush()
+        return redirect_to('resume.editor', template_id='classic', resume_id=new_resume.id)
+
+    job_id = submit_job('convert_resume', extract_editable_content, filepath, file_ext,
+                        on_done=create_editable_copy)
+    return redirect(url_for('jobs.wait', job_id=job_id))
@@ -0,0 +1,125 @@
+"""
+Line-oriented resume segmenter shared by the resume builder and ATS checker.
+
+parse_resume() walks the text once, line by line, against precompiled
+patterns:
+
+- SECTION_HEADER_RE recognises heading lines ("Work Experience", "SKILLS:")
+  and routes the following lines into experience/education/skills/
+  projects/summary buckets
+- SECTION_KEYWORDS are the looser keyword checks the ATS uses to decide
+  whether a section exists at all; they are matched per line, which is
+  equivalent to searching the whole text since none spans a newline
+- EMAIL_RE / PHONE_RE pick up contact details
+
+Results are memoised per text, so the editor conversion and ATS scoring of
+the same resume share one parse; treat them as read-only.
+"""
+import re
+from functools import lru_cache
+
+# Section name -> keyword pattern used for ATS "section present" checks
+SECTION_KEYWORDS = {
+    'Experience': re.compile(r'experience|employment|work history|background', re.I),
+    'Education': re.compile(r'education|academic|degree', re.I),
+    'Skills': re.compile(r'skills|technologies|expertise|tools', re.I),
+    'Summary': re.compile(r'summary|objective|profile', re.I),
+}
+
+SECTION_HEADER_RE = re.compile(
+    r'^\W*(?:'
+    r'(?P<experience>(?:work|professional|relevant)?\s*experience|employment(?:\s+history)?|work\s+history|internships?)'
+    r'|(?P<education>education(?:al)?(?:\s+background)?|academics?(?:\s+background)?|qualifications)'
+    r'|(?P<skills>(?:technical\s+|key\s+|core\s+)?skills(?:\s+(?:&|and)\s+\w+)?|technologies|tools|expertise|competencies)'
+    r'|(?P<projects>(?:academic\s+|personal\s+|key\s+)?projects?)'
+    r'|(?P<summary>(?:professional\s+)?summary|objective|(?:career\s+)?profile|about\s+me)'
+    r'|(?P<other>achievements?|awards?|certifications?|honou?rs|publications|activities|interests|hobbies'
+    r'|languages|volunteer(?:ing)?|references|extra[- ]?curricular(?:\s+activities)?)'
+    r')\W*$',
+    re.I
+)
+
+EMAIL_RE = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+PHONE_RE = re.compile(r'(\+\d{1,3}[- ]?)?\(?\d{3}\)?[- ]?\d{3}[- ]?\d{4}')
+SKILL_SPLIT_RE = re.compile(r'\s*(?:[,|;•·]|\s{2,})\s*')
+
+# Heading lines are short; longer lines that merely start with a keyword are content
+MAX_HEADER_WORDS = 4
+
+
+@lru_cache(maxsize=64)
+def parse_resume(text):
+    """
+    Returns a dict with name, email, phone, the lines of each recognised
+    section (experience, education, skills, projects, summary, and other
+    for achievements/certifications/etc.), the lines before the first
+    heading (header), and sections_found: the SECTION_KEYWORDS names
+    present anywhere in the text.
+    """
+    result = {
+        'name': '',
+        'email': '',
+        'phone': '',
+        'header': [],
+        'experience': [],
+        'education': [],
+        'skills': [],
+        'projects': [],
+        'summary': [],
+        'other': [],
+        'sections_found': set(),
+    }
+    pending_keywords = dict(SECTION_KEYWORDS)
+    current = 'header'
+
+    for raw_line in text.split('\n'):
+        for name, pattern in list(pending_keywords.items()):
+            if pattern.search(raw_line):
+                result['sections_found'].add(name)
+                del pending_keywords[name]
+
+        if not result['email']:
+            match = EMAIL_RE.search(raw_line)
+            if match:
+                result['email'] = match.group(0)
+        if not result['phone']:
+            match = PHONE_RE.search(raw_line)
+            if match:
+                result['phone'] = match.group(0)
+
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        if len(line.split()) <= MAX_HEADER_WORDS:
+            header = SECTION_HEADER_RE.match(line)
+            if header:
+                current = header.lastgroup
+                continue
+
+        result[current].append(line)
+
+    for line in result['header']:
+        # First header line that is not a contact detail is taken as the name
+        if not EMAIL_RE.search(line) and not PHONE_RE.search(line) and len(line.split()) <= 5:
+            result['name'] = line
+            break
+
+    result['sections_found'] = frozenset(result['sections_found'])
+    return result
+
+
+def split_skills(lines):
+    """Flattens skills lines ("Python, SQL | Git") into a de-duplicated list."""
+    skills = []
+    seen = set()
+    for line in lines:
+        if ':' in line:
+            # "Languages: Python, Go" -> keep the list part
+            line = line.split(':', 1)[1]
+        for skill in SKILL_SPLIT_RE.split(line):
+            skill = skill.strip(' -*')
+            if skill and skill.lower() not in seen:
+                seen.add(skill.lower())
+                skills.append(skill)
+    return skills
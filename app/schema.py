@@ -0,0 +1,62 @@
+"""
+Lightweight in-place schema upgrades.
+
+db.create_all() only creates missing tables, so columns and indexes added
+to existing models never reach databases created by an older version
+(see fix_db.py for the manual way this used to be done). upgrade_schema()
+adds any missing nullable columns and indexes, and backfills derived data
+once, when the column holding it is added.
+"""
+from sqlalchemy import inspect, text
+from . import db
+
+
+def _add_missing_columns(inspector, table):
+    """Adds the table's missing nullable columns; returns the names added."""
+    added = []
+    existing = {c['name'] for c in inspector.get_columns(table.name)}
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable:
+            print(f"Skipping non-nullable column {table.name}.{column.name}; migrate it manually.")
+            continue
+        col_type = column.type.compile(dialect=db.engine.dialect)
+        db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+        print(f"Added column {table.name}.{column.name}")
+        added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def _backfill_event_due_at():
+    from .models import Event
+
+    pending = Event.query.filter(Event.due_at.is_(None)).all()
+    for event in pending:
+        event.due_at = event.compute_due_at()
+    if pending:
+        print(f"Backfilled due_at for {len(pending)} events")
+
+
+def upgrade_schema():
+    """
+    Brings an existing database up to date with the models. Must run inside
+    an app context, after db.create_all().
+    """
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+
+    added = set()
+    for table in db.metadata.sorted_tables:
+        if table.name in tables:
+            added.update(_add_missing_columns(inspector, table))
+
+    # Backfills run only right after their column is added, so rows they
+    # cannot fill (e.g. unparseable dates) are not reloaded on every start
+    if 'event.due_at' in added:
+        _backfill_event_due_at()
+    db.session.commit()
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
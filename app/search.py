@@ -0,0 +1,111 @@
+"""
+Full-text search over the InterviewQuestion bank.
+
+Questions are mirrored into an SQLite FTS5 table that is kept in sync by
+triggers, so rows added by the app, by seed_questions.py or by any other
+process are indexed in the same transaction. A lookup ranks candidates
+with BM25 and only reads the matching postings instead of the whole table.
+"""
+import re
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from . import db
+
+FTS_TABLE = 'interview_question_fts'
+
+# How many BM25-ranked candidates the chatbot re-scores per message
+CANDIDATE_LIMIT = 25
+
+_fts_available = False
+
+_SETUP_STATEMENTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        question, category,
+        content='interview_question', content_rowid='id',
+        tokenize='unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS interview_question_fts_ai
+        AFTER INSERT ON interview_question BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, question, category)
+            VALUES (new.id, new.question, new.category);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS interview_question_fts_ad
+        AFTER DELETE ON interview_question BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, question, category)
+            VALUES ('delete', old.id, old.question, old.category);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS interview_question_fts_au
+        AFTER UPDATE ON interview_question BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, question, category)
+            VALUES ('delete', old.id, old.question, old.category);
+            INSERT INTO {FTS_TABLE}(rowid, question, category)
+            VALUES (new.id, new.question, new.category);
+        END""",
+]
+
+
+def ensure_index():
+    """
+    Creates the FTS5 table and sync triggers if missing and backfills the
+    index from existing rows. Must run inside an app context.
+    """
+    global _fts_available
+
+    if db.engine.dialect.name != 'sqlite':
+        _fts_available = False
+        return False
+
+    try:
+        existed = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"),
+            {'name': FTS_TABLE}
+        ).first() is not None
+
+        for statement in _SETUP_STATEMENTS:
+            db.session.execute(text(statement))
+
+        if not existed:
+            # First run against an already populated database
+            db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+        db.session.commit()
+        _fts_available = True
+    except OperationalError as e:
+        db.session.rollback()
+        print(f"FTS5 index unavailable, falling back to table scan: {e}")
+        _fts_available = False
+
+    return _fts_available
+
+
+def _match_expression(words):
+    # Quote every token so user input can never inject FTS5 query syntax;
+    # the trailing * keeps plural/suffixed forms matching like a substring would.
+    tokens = re.findall(r'\w+', ' '.join(words).lower())
+    return ' OR '.join(f'"{t}"*' for t in dict.fromkeys(tokens))
+
+
+def search_questions(words, limit=CANDIDATE_LIMIT):
+    """
+    Returns InterviewQuestion rows matching any of `words`, best BM25 match first.
+    """
+    from .models import InterviewQuestion
+
+    if not _fts_available:
+        return InterviewQuestion.query.all()
+
+    expression = _match_expression(words)
+    if not expression:
+        return []
+
+    rows = db.session.execute(
+        text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q "
+             f"ORDER BY bm25({FTS_TABLE}) LIMIT :limit"),
+        {'q': expression, 'limit': limit}
+    ).all()
+    ids = [r[0] for r in rows]
+    if not ids:
+        return []
+
+    by_id = {q.id: q for q in InterviewQuestion.query.filter(InterviewQuestion.id.in_(ids))}
+    return [by_id[i] for i in ids if i in by_id]
@@ -0,0 +1,70 @@
+"""
+In-memory registry of resume builder templates from templates.json.
+
+The file is parsed once and indexed by template id. Each lookup stats the
+file and reloads only when its mtime changes, so edits to templates.json
+still show up without a restart.
+"""
+import os
+import json
+import threading
+
+TEMPLATES_PATH = os.path.join(os.path.dirname(__file__), 'templates.json')
+
+
+class TemplateRegistry:
+    def __init__(self, path=TEMPLATES_PATH):
+        self.path = path
+        self._mtime = None
+        self._templates = []
+        self._by_id = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        if mtime == self._mtime and (mtime is None or self._templates):
+            return
+
+        with self._lock:
+            if mtime == self._mtime and self._templates:
+                return
+            templates = []
+            if mtime is not None:
+                with open(self.path, 'r') as f:
+                    templates = json.load(f)
+            self._templates = templates
+            self._by_id = {t['id']: t for t in templates}
+            self._mtime = mtime
+
+    def all(self):
+        self._refresh()
+        return self._templates
+
+    def get(self, template_id):
+        self._refresh()
+        return self._by_id.get(template_id)
+
+    def names(self):
+        self._refresh()
+        return {t['id']: t['name'] for t in self._templates}
+
+    def precompile(self, jinja_env):
+        """
+        Compiles every template layout into the Jinja cache so the first
+        editor render does not pay for parsing it.
+        """
+        compiled = 0
+        for template in self.all():
+            try:
+                jinja_env.get_template(template['html_layout'])
+                compiled += 1
+            except Exception as e:
+                print(f"Could not precompile {template['html_layout']}: {e}")
+        return compiled
+
+
+registry = TemplateRegistry()
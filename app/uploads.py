@@ -0,0 +1,49 @@
+"""
+Streaming helpers for user file uploads.
+
+Uploads are copied in fixed-size chunks while a sha256 is computed and a
+byte limit enforced, so a request never holds the whole file in memory.
+"""
+import os
+import hashlib
+
+CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv('RESUME_MAX_BYTES', 5 * 1024 * 1024))
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def _copy_chunks(stream, out, max_bytes):
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"File exceeds {max_bytes // (1024 * 1024)} MB limit.")
+        digest.update(chunk)
+        if out is not None:
+            out.write(chunk)
+    return digest.hexdigest(), size
+
+
+def save_upload(file, filepath, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Streams an uploaded FileStorage to `filepath`. Returns (sha256, size).
+    Nothing is left on disk if the limit is exceeded.
+    """
+    tmp_path = f"{filepath}.part"
+    try:
+        with open(tmp_path, 'wb') as out:
+            result = _copy_chunks(file.stream, out, max_bytes)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return result
+
@@ -0,0 +1,31 @@
+import os
+import sys
+import json
+import argparse
+from app.ats_batch import score_batch
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a folder or zip of resumes and print JSON Lines.")
+    parser.add_argument("path", help="Directory or .zip containing PDF/DOCX resumes")
+    parser.add_argument("--jd", help="Path to a text file with the job description")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    args = parser.parse_args()
+
+    job_description = None
+    if args.jd:
+        with open(args.jd, 'r', encoding='utf-8') as f:
+            job_description = f.read()
+
+    scored = failed = 0
+    workers = args.workers or os.cpu_count() or 1
+    for result in score_batch(args.path, job_description, workers):
+        print(json.dumps(result), flush=True)
+        if 'error' in result:
+            failed += 1
+        else:
+            scored += 1
+
+    print(f"Scored {scored} resumes, {failed} failed.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
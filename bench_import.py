@@ -0,0 +1,108 @@
+import os
+import re
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_import_baseline.json')
+OUTPUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_output.txt')
+
+# Only needed when a document is parsed/rendered or the AI fallback is called
+HEAVY_MODULES = ('pypdf', 'docx', 'pdfminer', 'reportlab', 'groq')
+
+COLD_START = "from app import create_app; create_app()"
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def run_once():
+    """
+    Runs create_app() in a fresh interpreter under -X importtime.
+    Returns (total import time in ms, set of modules imported, raw stderr).
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', COLD_START],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise SystemExit(f"create_app() failed with exit code {proc.returncode}")
+
+    total_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, module = match.groups()
+        modules.add(module)
+        # A single space marks a top-level import; nested ones are already in its cumulative time
+        if len(indent) == 1:
+            total_us += int(cumulative)
+    return total_us / 1000, modules, proc.stderr
+
+
+def bench_import(runs=5):
+    """
+    Measures create_app() cold-start import time. The first run warms the
+    bytecode cache and is discarded; the median of the rest is reported.
+    """
+    run_once()
+    totals = []
+    loaded = set()
+    raw = ""
+    for _ in range(runs):
+        total_ms, modules, raw = run_once()
+        totals.append(total_ms)
+        loaded.update(modules)
+
+    heavy = sorted({m.split('.')[0] for m in loaded} & set(HEAVY_MODULES))
+    with open(OUTPUT_PATH, 'w') as f:
+        f.write(raw)
+
+    median = statistics.median(totals)
+    print(f"create_app() import time over {runs} runs: median {median:.1f} ms "
+          f"(min {min(totals):.1f}, max {max(totals):.1f})")
+    print(f"Raw -X importtime output of the last run: {OUTPUT_PATH}")
+    return median, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import benchmark for create_app()")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown over the baseline (0.25 = 25%%)")
+    parser.add_argument('--update', action='store_true', help="record the result as the new baseline")
+    args = parser.parse_args()
+
+    median, heavy = bench_import(args.runs)
+    failed = False
+
+    if heavy:
+        print(f"❌ Heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+
+    if args.update:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump({'median_ms': round(median, 1), 'python': sys.version.split()[0]}, f, indent=2)
+            f.write('\n')
+        print(f"Baseline updated: {median:.1f} ms")
+    elif os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)['median_ms']
+        limit = baseline * (1 + args.tolerance)
+        if median > limit:
+            print(f"❌ Regression: {median:.1f} ms > {limit:.1f} ms (baseline {baseline} ms + {args.tolerance:.0%})")
+            failed = True
+        else:
+            print(f"✅ Within budget: {median:.1f} ms <= {limit:.1f} ms (baseline {baseline} ms)")
+    else:
+        print("No baseline yet; run with --update to record one.")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
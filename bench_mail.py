@@ -0,0 +1,30 @@
+import os
+import sys
+import time
+import tempfile
+from app.mailer import Dispatcher, FileTransport, EmailMessage
+
+def bench_mail(count=1000, workers=4):
+    """
+    Measures dispatcher throughput against the local file sink, so no
+    network or mail provider is involved.
+    """
+    outbox = os.path.join(tempfile.mkdtemp(), 'outbox.jsonl')
+    dispatcher = Dispatcher(FileTransport(outbox), max_workers=workers)
+    messages = [
+        EmailMessage(f"student{i}@example.com", f"Reminder #{i}", "Benchmark body")
+        for i in range(count)
+    ]
+
+    start = time.perf_counter()
+    results = dispatcher.send_batch(messages)
+    elapsed = time.perf_counter() - start
+
+    print(f"Sent {sum(results)}/{count} messages with {workers} workers in {elapsed:.3f}s "
+          f"({count / elapsed:.0f} msg/s)")
+    print(f"Outbox: {outbox}")
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    bench_mail(count, workers)
@@ -1,6 +1,8 @@
 from app import create_app
 
-app = create_app()
+# Job pool workers re-import this script as __mp_main__; only the server builds the app
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
     app.run(debug=True, use_reloader=False)
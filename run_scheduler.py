@@ -0,0 +1,25 @@
+"""
+Standalone process for scheduled jobs (reminder emails).
+
+Deploy it next to the web server and start the web workers with
+SCHEDULER_MODE=off so they never run jobs themselves. Several copies may
+run at once for failover; the scheduler lease keeps only one active.
+"""
+import os
+import time
+
+# Web workers may share this environment with SCHEDULER_MODE=off; this
+# process exists to run jobs, so it always competes for the lease
+os.environ['SCHEDULER_MODE'] = 'lease'
+
+from app import create_app
+
+app = create_app()
+
+if __name__ == '__main__':
+    print("⏰ Scheduler process running. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("Scheduler process stopped.")
@@ -1,5 +1,6 @@
 from app import create_app, db
 from app.models import InterviewQuestion
+from app.interview import invalidate_categories
 
 app = create_app()
 
@@ -286,6 +287,8 @@ def seed_data():
             db.session.add(question)
         
         db.session.commit()
+        # Bulk delete skips mapper events; drop the cached category list explicitly
+        invalidate_categories()
         print("Successfully seeded interview questions!")
 
 if __name__ == "__main__":